@@ -1,40 +1,132 @@
-from transformers import pipeline
+import sys
+import os
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
 import asyncio
 import json
-import os
 import torch
+import aiohttp
 from transformers import pipeline
-from huggingface_hub import InferenceClient
+from batching import MicroBatcher
+from result_cache import create_result_cache, normalize_query
+from EmotionBot.quantized import (
+    DEFAULT_ARTIFACT_DIR,
+    QuantizedEmotionClassifier,
+    artifact_present,
+    model_name,
+)
 
-# Check if GPU is available
-use_local_model = torch.cuda.is_available()
+# "auto" runs the fp32 model locally when a GPU is available, the int8 CPU
+# model when an artifact from EmotionBot/quantized.py is present, and
+# otherwise uses the Inference API. "local", "quantized" and "remote" force
+# one of those backends.
+emotion_backend = os.getenv("EMOTION_BACKEND", "auto").lower()
+quantized_dir = os.getenv("EMOTION_QUANTIZED_DIR", DEFAULT_ARTIFACT_DIR)
+if emotion_backend == "auto":
+    if torch.cuda.is_available():
+        emotion_backend = "local"
+    elif artifact_present(quantized_dir):
+        emotion_backend = "quantized"
+    else:
+        emotion_backend = "remote"
+use_local_model = emotion_backend in ("local", "quantized")
 
 if use_local_model:
     # Load the model locally
-    emotion_model = pipeline(
-        task="text-classification", model="SamLowe/roberta-base-go_emotions", top_k=None
+    if emotion_backend == "quantized":
+        emotion_model = QuantizedEmotionClassifier(quantized_dir)
+    else:
+        emotion_model = pipeline(task="text-classification", model=model_name, top_k=None)
+
+    def classify_batch(queries):
+        # One padded forward pass over every query collected by the batcher.
+        return emotion_model(queries, top_k=3, batch_size=len(queries))
+
+    # Concurrent queries are coalesced into micro-batches on a dedicated
+    # thread, so inference never blocks the event loop; torch releases the
+    # GIL while the forward pass runs.
+    emotion_batcher = MicroBatcher(
+        classify_batch,
+        max_batch_size=int(os.getenv("EMOTION_BATCH_SIZE", 16)),
+        max_wait_ms=float(os.getenv("EMOTION_BATCH_WAIT_MS", 5)),
+        name="emotion-batcher",
     )
 else:
     key = os.getenv("HUGGINGFACE_API_KEY")
 
-    # Use Hugging Face Inference API
-    hf_client = InferenceClient(
-        model="SamLowe/roberta-base-go_emotions",
-        # top_k=3,
-        api_key=key,
-    )
+    # Use Hugging Face Inference API through a pooled async HTTP client.
+    api_url = f"https://api-inference.huggingface.co/models/{model_name}"
+    http_pool_size = int(os.getenv("EMOTION_HTTP_POOL_SIZE", 32))
+    http_timeout = aiohttp.ClientTimeout(total=float(os.getenv("EMOTION_HTTP_TIMEOUT", 30)))
+
+# Short repeated messages ("ok", "thanks") skip inference entirely.
+emotion_cache = create_result_cache("emotion")
+
+_http_session = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    One keep-alive connection pool for the app's event loop, reused by every
+    request on it. Close it with `close_http_session` at shutdown.
+    """
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=http_pool_size),
+            timeout=http_timeout,
+            headers={"Authorization": f"Bearer {key}"},
+        )
+    return _http_session
+
+
+async def close_http_session() -> None:
+    """Close the pooled session; run on the loop that used it."""
+    global _http_session
+    session, _http_session = _http_session, None
+    if session is not None:
+        await session.close()
+
+
+async def remote_emotion_detection(query, top_k=3):
+    session = get_http_session()
+    async with session.post(
+        api_url,
+        json={
+            "inputs": query,
+            "parameters": {"top_k": top_k},
+            "options": {"wait_for_model": True},
+        },
+    ) as response:
+        response.raise_for_status()
+        results = await response.json()
+    # A single input comes back as [[{label, score}, ...]]
+    if results and isinstance(results[0], list):
+        results = results[0]
+    return results
 
 
 async def emotion_detection(query):
     """
     Detects the emotion in the input query.
-    Uses local model if GPU is available, otherwise uses Hugging Face Inference API.
+    Uses a local model if a GPU or an int8 CPU artifact is available (see
+    EMOTION_BACKEND), otherwise uses Hugging Face Inference API.
+    Returns the top 3 emotions as [{"label": ..., "score": ...}].
     """
+    cache_key = normalize_query(query)
+    results = await emotion_cache.aget(cache_key)
+    if results is not None:
+        return results
+
     if use_local_model:
-        results = emotion_model(query, top_k=3)
+        results = await emotion_batcher.asubmit(query)
     else:
-        results = hf_client.text_classification(query, top_k=3)
+        results = await remote_emotion_detection(query, top_k=3)
 
+    await emotion_cache.aset(cache_key, results)
     return results
 
 
@@ -0,0 +1,196 @@
+import sys
+import os
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import csv
+import time
+import argparse
+import numpy as np
+import torch
+from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+
+model_name = "SamLowe/roberta-base-go_emotions"
+DEFAULT_ARTIFACT_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "go_emotions_int8"
+)
+TORCH_WEIGHTS = "model_int8.pt"
+ONNX_WEIGHTS = "model_int8.onnx"
+MAX_LENGTH = 512
+
+
+def artifact_present(artifact_dir=DEFAULT_ARTIFACT_DIR) -> bool:
+    return os.path.isfile(os.path.join(artifact_dir, TORCH_WEIGHTS)) or os.path.isfile(
+        os.path.join(artifact_dir, ONNX_WEIGHTS)
+    )
+
+
+def quantize_linear_layers(model):
+    """Dynamic int8 quantization of every Linear layer (weights int8, activations fp32)."""
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def export(out_dir=DEFAULT_ARTIFACT_DIR, fmt="torch"):
+    """
+    Convert the GoEmotions model into a CPU int8 artifact: either a dynamically
+    quantized PyTorch state dict or a dynamically quantized ONNX graph.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(out_dir)
+    model.config.save_pretrained(out_dir)
+
+    if fmt == "torch":
+        torch.save(quantize_linear_layers(model).state_dict(), os.path.join(out_dir, TORCH_WEIGHTS))
+    else:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        fp32_path = os.path.join(out_dir, "model_fp32.onnx")
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=17,
+        )
+        quantize_dynamic(fp32_path, os.path.join(out_dir, ONNX_WEIGHTS), weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+    print(f"[INFO] Saved {fmt} int8 artifact to '{out_dir}'.")
+
+
+class QuantizedEmotionClassifier:
+    """
+    CPU int8 GoEmotions classifier with the same call signature and output
+    format as the transformers text-classification pipeline.
+    """
+
+    def __init__(self, artifact_dir=DEFAULT_ARTIFACT_DIR):
+        self.tokenizer = AutoTokenizer.from_pretrained(artifact_dir)
+        config = AutoConfig.from_pretrained(artifact_dir)
+        self.labels = [config.id2label[i] for i in range(len(config.id2label))]
+
+        onnx_path = os.path.join(artifact_dir, ONNX_WEIGHTS)
+        if os.path.isfile(onnx_path):
+            import onnxruntime
+
+            self.session = onnxruntime.InferenceSession(
+                onnx_path, providers=["CPUExecutionProvider"]
+            )
+            self.model = None
+        else:
+            self.session = None
+            model = AutoModelForSequenceClassification.from_config(config)
+            self.model = quantize_linear_layers(model).eval()
+            self.model.load_state_dict(
+                torch.load(os.path.join(artifact_dir, TORCH_WEIGHTS), weights_only=False)
+            )
+
+    def logits(self, queries):
+        if self.session is not None:
+            inputs = self.tokenizer(
+                queries, padding=True, truncation=True, max_length=MAX_LENGTH, return_tensors="np"
+            )
+            return self.session.run(
+                ["logits"],
+                {
+                    "input_ids": inputs["input_ids"].astype(np.int64),
+                    "attention_mask": inputs["attention_mask"].astype(np.int64),
+                },
+            )[0]
+        inputs = self.tokenizer(
+            queries, padding=True, truncation=True, max_length=MAX_LENGTH, return_tensors="pt"
+        )
+        with torch.inference_mode():
+            return self.model(**inputs).logits.numpy()
+
+    def __call__(self, queries, top_k=3, batch_size=None):
+        single = isinstance(queries, str)
+        batch = [queries] if single else list(queries)
+        # GoEmotions is multi-label, so scores are independent sigmoids.
+        scores = 1.0 / (1.0 + np.exp(-self.logits(batch)))
+        top = np.argsort(-scores, axis=1)[:, :top_k]
+        results = [
+            [{"label": self.labels[j], "score": float(row[j])} for j in idx]
+            for row, idx in zip(scores, top)
+        ]
+        return results[0] if single else results
+
+
+def sample_messages(limit):
+    """Real user messages taken from the StrategyBot ESConv test split."""
+    from StrategyBot.utils import parse_conversation
+
+    messages = []
+    path = os.path.join(BASE_DIR, "StrategyBot", "test.csv")
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            turns = parse_conversation(row["text"])
+            if turns and turns[-1]["role"] == "usr":
+                messages.append(turns[-1]["content"])
+            if len(messages) >= limit:
+                break
+    return messages
+
+
+def evaluate(artifact_dir, limit):
+    """Top-3 agreement and per-message latency of the int8 model vs the fp32 pipeline."""
+    from transformers import pipeline
+
+    queries = sample_messages(limit)
+    reference = pipeline(task="text-classification", model=model_name, top_k=None, device=-1)
+    quantized = QuantizedEmotionClassifier(artifact_dir)
+
+    def timed(fn):
+        results, latencies = [], []
+        for q in queries:
+            start = time.perf_counter()
+            results.append(fn(q))
+            latencies.append(time.perf_counter() - start)
+        return results, sorted(latencies)
+
+    ref_results, ref_lat = timed(lambda q: reference(q, top_k=3))
+    q_results, q_lat = timed(lambda q: quantized(q, top_k=3))
+
+    top1 = np.mean([r[0]["label"] == q[0]["label"] for r, q in zip(ref_results, q_results)])
+    top3 = np.mean(
+        [
+            {x["label"] for x in r} == {x["label"] for x in q}
+            for r, q in zip(ref_results, q_results)
+        ]
+    )
+    p = lambda lat, pct: lat[int(round(pct / 100 * (len(lat) - 1)))] * 1000
+    print(f"[INFO] {len(queries)} messages from StrategyBot/test.csv")
+    print(f"[INFO] Top-1 agreement: {top1:.3f}, top-3 set agreement: {top3:.3f}")
+    print(f"[INFO] fp32 pipeline p50 {p(ref_lat, 50):.1f}ms p99 {p(ref_lat, 99):.1f}ms")
+    print(f"[INFO] int8 model    p50 {p(q_lat, 50):.1f}ms p99 {p(q_lat, 99):.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export an int8 CPU copy of the GoEmotions model and compare it with fp32."
+    )
+    parser.add_argument("--out_dir", default=DEFAULT_ARTIFACT_DIR)
+    parser.add_argument("--format", choices=["torch", "onnx"], default="torch")
+    parser.add_argument("--skip_export", action="store_true")
+    parser.add_argument("--evaluate", action="store_true")
+    parser.add_argument("--limit", type=int, default=500)
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        export(args.out_dir, args.format)
+    if args.evaluate:
+        evaluate(args.out_dir, args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import os
+import json
+
+MANIFEST_FILE = "manifest.json"
+
+
+def shard_name(source: str) -> str:
+    """File name of the JSONL shard holding one book's records."""
+    return f"{source}.jsonl"
+
+
+def file_fingerprint(path) -> dict:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_manifest(shard_dir: str) -> dict:
+    path = os.path.join(shard_dir, MANIFEST_FILE)
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(shard_dir: str, manifest: dict) -> None:
+    """Write the manifest atomically so a crash never leaves it half written."""
+    path = os.path.join(shard_dir, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def iter_records(shard_path: str):
+    """Yield the records of one shard, one page or chapter at a time."""
+    with open(shard_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_books(shard_dir: str):
+    """
+    Yield (source, records) for every completed book in the manifest, one
+    book at a time, so readers never hold more than one book in memory.
+    """
+    for source, entry in sorted(load_manifest(shard_dir).items()):
+        yield source, list(iter_records(os.path.join(shard_dir, entry["shard"])))
@@ -0,0 +1,116 @@
+import os
+import json
+import mmap
+import hashlib
+import shutil
+
+import numpy as np
+from langchain_core.documents import Document
+
+BLOB_FILE = "chunks.bin"
+OFFSETS_FILE = "chunk_offsets.npy"
+IDS_FILE = "chunk_ids.json"
+METADATA_FILE = "chunk_metadata.json"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(text: str) -> str:
+    """Content-addressed chunk id: identical text gets the same id in every book."""
+    return content_hash(text)
+
+
+def replace_store(tmp_dir: str, store_dir: str) -> None:
+    """Swap a freshly written store directory into place."""
+    old_dir = f"{store_dir}.old"
+    if os.path.isdir(store_dir):
+        os.replace(store_dir, old_dir)
+    os.replace(tmp_dir, store_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+class ChunkStoreWriter:
+    """
+    Streams chunks into a store directory: texts are appended to one UTF-8
+    blob and their byte offsets, ids and metadata are written on close().
+    """
+
+    def __init__(self, store_dir: str):
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        self._blob = open(os.path.join(store_dir, BLOB_FILE), "wb")
+        self._offsets = [0]
+        self._ids = []
+        self._metadatas = []
+
+    def add(self, chunk_id: str, text: str, metadata: dict = None) -> int:
+        """Append a chunk and return its row number."""
+        data = text.encode("utf-8")
+        self._blob.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+        self._ids.append(chunk_id)
+        self._metadatas.append(metadata or {})
+        return len(self._ids) - 1
+
+    def close(self) -> None:
+        self._blob.close()
+        np.save(
+            os.path.join(self.store_dir, OFFSETS_FILE),
+            np.asarray(self._offsets, dtype=np.int64),
+        )
+        with open(os.path.join(self.store_dir, IDS_FILE), "w", encoding="utf-8") as f:
+            json.dump(self._ids, f)
+        with open(os.path.join(self.store_dir, METADATA_FILE), "w", encoding="utf-8") as f:
+            json.dump(self._metadatas, f, ensure_ascii=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ChunkStore:
+    """
+    Read-only view of a store directory. The text blob and offsets are memory
+    mapped, so a hit is resolved by slicing the mapping and every worker
+    process on the host shares the same page cache.
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self._file = open(os.path.join(store_dir, BLOB_FILE), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.offsets = np.load(os.path.join(store_dir, OFFSETS_FILE), mmap_mode="r")
+        with open(os.path.join(store_dir, IDS_FILE), "r", encoding="utf-8") as f:
+            self.ids = json.load(f)
+        with open(os.path.join(store_dir, METADATA_FILE), "r", encoding="utf-8") as f:
+            self.metadatas = json.load(f)
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+
+    @staticmethod
+    def exists(store_dir: str) -> bool:
+        return os.path.isfile(os.path.join(store_dir, OFFSETS_FILE))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row_of(self, chunk_id: str):
+        return self._rows.get(chunk_id)
+
+    def text(self, row: int) -> str:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return self._blob[start:end].decode("utf-8")
+
+    def document(self, row: int) -> Document:
+        return Document(
+            id=self.ids[row], page_content=self.text(row), metadata=self.metadatas[row]
+        )
+
+    def documents_by_id(self, chunk_ids) -> list:
+        """Documents for the given ids, skipping ids the store does not know."""
+        rows = (self.row_of(chunk_id) for chunk_id in chunk_ids)
+        return [self.document(row) for row in rows if row is not None]
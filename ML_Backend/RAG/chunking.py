@@ -0,0 +1,187 @@
+import re
+import threading
+
+from RAG.embedding_registry import DEFAULT_MODEL
+
+# all-mpnet-base-v2 truncates its input at 384 tokens, special tokens included.
+MODEL_MAX_TOKENS = 384
+
+PARAGRAPH_RE = re.compile(r"\n\s*\n")
+SENTENCE_RE = re.compile(r"(?<=[.!?…])[\"'”’)\]]*\s+(?=[\"'“‘(\[]?[A-Z0-9])")
+
+_tokenizers = {}
+_lock = threading.Lock()
+
+
+def get_tokenizer(model_name: str = DEFAULT_MODEL):
+    """The embedding model's own (fast) tokenizer, loaded once per process."""
+    if model_name not in _tokenizers:
+        with _lock:
+            if model_name not in _tokenizers:
+                from transformers import AutoTokenizer
+
+                _tokenizers[model_name] = AutoTokenizer.from_pretrained(model_name)
+    return _tokenizers[model_name]
+
+
+def split_paragraphs(text: str):
+    """Paragraphs of a page, with PDF hard line breaks folded into spaces."""
+    for paragraph in PARAGRAPH_RE.split(text):
+        paragraph = " ".join(paragraph.split())
+        if paragraph:
+            yield paragraph
+
+
+class TokenChunker:
+    """
+    Packs whole paragraphs, then whole sentences, into chunks of at most
+    `max_tokens` model tokens, so nothing is cut off by the embedding
+    window. A sentence longer than the window is cut at token offsets. A
+    book's last chunk is merged into the one before it when it is shorter
+    than `min_tokens` and fits. `overlap_tokens` repeats trailing units of
+    the previous chunk, up to that many tokens (0 disables overlap).
+
+    Input is a book's records from extract_text.py (one per page or
+    chapter). Each chunk carries the page range or chapter it came from.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 256,
+        min_tokens: int = 32,
+        overlap_tokens: int = 0,
+        model_name: str = DEFAULT_MODEL,
+    ):
+        if max_tokens > MODEL_MAX_TOKENS - 2:
+            raise ValueError(
+                f"max_tokens must leave room for special tokens (<= {MODEL_MAX_TOKENS - 2})."
+            )
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.overlap_tokens = overlap_tokens
+        self.model_name = model_name
+
+    @property
+    def signature(self) -> str:
+        """Identifies the settings; ingestion re-chunks books when it changes."""
+        return f"token:{self.model_name}:{self.max_tokens}:{self.min_tokens}:{self.overlap_tokens}"
+
+    def count_tokens(self, texts):
+        tokenizer = get_tokenizer(self.model_name)
+        return [len(ids) for ids in tokenizer(list(texts), add_special_tokens=False)["input_ids"]]
+
+    def _cut_long(self, sentence: str):
+        """Cut one oversize sentence into windows of max_tokens at token offsets."""
+        tokenizer = get_tokenizer(self.model_name)
+        offsets = tokenizer(sentence, add_special_tokens=False, return_offsets_mapping=True)[
+            "offset_mapping"
+        ]
+        for start in range(0, len(offsets), self.max_tokens):
+            window = offsets[start : start + self.max_tokens]
+            yield sentence[window[0][0] : window[-1][1]], len(window)
+
+    def _units(self, records):
+        """
+        (text, tokens, location, joiner) units: whole paragraphs where they
+        fit, else their sentences. `location` is the record's page/chapter.
+        """
+        paragraphs = [
+            (paragraph, location_of(record))
+            for record in records
+            for paragraph in split_paragraphs(record.get("text") or "")
+        ]
+        counts = self.count_tokens(p for p, _ in paragraphs) if paragraphs else []
+        for (paragraph, location), tokens in zip(paragraphs, counts):
+            if tokens <= self.max_tokens:
+                yield paragraph, tokens, location, "\n\n"
+                continue
+            sentences = [s for s in SENTENCE_RE.split(paragraph) if s.strip()]
+            joiner = "\n\n"
+            for sentence, sentence_tokens in zip(sentences, self.count_tokens(sentences)):
+                if sentence_tokens <= self.max_tokens:
+                    yield sentence, sentence_tokens, location, joiner
+                else:
+                    for piece, piece_tokens in self._cut_long(sentence):
+                        yield piece, piece_tokens, location, joiner
+                        joiner = " "
+                joiner = " "
+
+    def split_records(self, records):
+        """Yield (text, metadata) chunks for one book's records."""
+        chunks = []  # lists of (text, tokens, location, joiner) units
+        current, current_tokens, carried = [], 0, 0
+        for unit in self._units(records):
+            if current and current_tokens + unit[1] > self.max_tokens:
+                chunks.append(current)
+                current = self._overlap(current)
+                # Drop carried units until the overlap and the new unit fit together.
+                while current and sum(u[1] for u in current) + unit[1] > self.max_tokens:
+                    current.pop(0)
+                current_tokens, carried = sum(u[1] for u in current), len(current)
+            current.append(unit)
+            current_tokens += unit[1]
+        if current:
+            fresh = current[carried:]
+            fresh_tokens = sum(u[1] for u in fresh)
+            if chunks and fresh_tokens < self.min_tokens and (
+                sum(u[1] for u in chunks[-1]) + fresh_tokens <= self.max_tokens
+            ):
+                chunks[-1].extend(fresh)
+            else:
+                chunks.append(current)
+
+        for units in chunks:
+            text = units[0][0] + "".join(joiner + t for t, _, _, joiner in units[1:])
+            yield text, chunk_metadata([u[2] for u in units])
+
+    def _overlap(self, units):
+        if self.overlap_tokens <= 0:
+            return []
+        kept, tokens = [], 0
+        for unit in reversed(units):
+            if tokens + unit[1] > self.overlap_tokens:
+                break
+            kept.insert(0, unit)
+            tokens += unit[1]
+        return kept
+
+
+class CharacterChunker:
+    """The original CharacterTextSplitter settings, kept for comparison."""
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+        from langchain.text_splitter import CharacterTextSplitter
+
+        self.splitter = CharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, separator="\n"
+        )
+        self.signature = f"character:{chunk_size}:{chunk_overlap}"
+
+    def split_records(self, records):
+        text = "\n".join(record.get("text") or "" for record in records)
+        for chunk in self.splitter.split_text(text):
+            yield chunk, {}
+
+
+def location_of(record: dict) -> dict:
+    return {key: record[key] for key in ("page", "chapter") if record.get(key) is not None}
+
+
+def chunk_metadata(locations) -> dict:
+    """Page range or chapter of a chunk; Chroma metadata cannot hold None."""
+    metadata = {}
+    pages = [loc["page"] for loc in locations if "page" in loc]
+    if pages:
+        metadata["page"] = min(pages)
+        if max(pages) != min(pages):
+            metadata["page_end"] = max(pages)
+    chapters = [loc["chapter"] for loc in locations if "chapter" in loc]
+    if chapters:
+        metadata["chapter"] = chapters[0]
+    return metadata
+
+
+def create_chunker(kind: str = "token", **kwargs):
+    if kind == "character":
+        return CharacterChunker(**kwargs)
+    return TokenChunker(**kwargs)
@@ -4,22 +4,47 @@ import json
 import re
 import argparse
 
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from RAG.book_shards import iter_records, load_manifest, save_manifest
+
+# C0 controls and DEL, except tab, line feed and carriage return.
+CONTROL_BYTES = bytes(b for b in range(0x20) if b not in (0x09, 0x0A, 0x0D)) + b"\x7f"
+# C1 controls (U+0080–U+009F) in UTF-8. 0xC2 is never a continuation byte,
+# so this cannot match inside another character.
+C1_UTF8_RE = re.compile(rb"\xc2[\x80-\x9f]")
+
 
 def remove_control_characters(text: str) -> str:
     """
     Removes ASCII control characters (0x00–0x1F, 0x7F–0x9F).
     Keeps standard printable characters, newlines, tabs, etc.
-    Adjust the regex as needed to remove or keep certain chars.
+    Same result as keeping only [\x09\x0A\x0D\x20-\x7E], in two C-level
+    passes: encoding to ASCII drops everything non-ASCII (surrogates
+    included) and bytes.translate deletes the control bytes.
+    """
+    return text.encode("ascii", "ignore").translate(None, CONTROL_BYTES).decode("ascii")
+
+
+def clean_text(text: str, mode: str = "ascii") -> str:
+    """
+    One pass over the encoded buffer instead of per-character Python loops.
+
+    "ascii" keeps printable ASCII plus tab/newline/carriage return (the
+    original behaviour). "unicode" keeps all valid Unicode and removes only
+    lone surrogates and control characters: encoding to UTF-8 with 'ignore'
+    drops the surrogates, and C0 bytes can be deleted from the UTF-8 buffer
+    directly because no multi-byte sequence contains a byte below 0x80.
     """
-    # This pattern allows:
-    #   - \x09 (tab), \x0A (line feed), \x0D (carriage return)
-    #   - \x20-\x7E (basic ASCII printable range)
-    # Everything else is replaced with ''.
-    cleaned = re.sub(r"[^\x09\x0A\x0D\x20-\x7E]+", "", text)
-    return cleaned
+    if mode == "ascii":
+        return remove_control_characters(text)
+    data = text.encode("utf-8", "ignore").translate(None, CONTROL_BYTES)
+    return C1_UTF8_RE.sub(b"", data).decode("utf-8")
 
 
-def clean_json_file(input_json: str, output_json: str) -> None:
+def clean_json_file(input_json: str, output_json: str, mode: str = "ascii") -> None:
     """
     Loads a JSON file, removes control characters from each value,
     and saves the cleaned data to a new JSON file.
@@ -45,7 +70,7 @@ def clean_json_file(input_json: str, output_json: str) -> None:
             continue
 
         original_text = value
-        cleaned_text = remove_control_characters(original_text)
+        cleaned_text = clean_text(original_text, mode)
         cleaned_data[key] = cleaned_text
 
         # Debug info
@@ -59,15 +84,55 @@ def clean_json_file(input_json: str, output_json: str) -> None:
     print(f"[INFO] Successfully wrote cleaned data to '{output_json}'.")
 
 
+def clean_shards(input_dir: str, output_dir: str, mode: str = "ascii") -> None:
+    """
+    Cleans a shard directory from `extract_text.py --shards` record by
+    record, so memory stays bounded by one page or chapter. Books already
+    cleaned with the same fingerprint and mode are skipped.
+    """
+    manifest = load_manifest(input_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    cleaned_manifest = load_manifest(output_dir)
+
+    for source, entry in sorted(manifest.items()):
+        done = cleaned_manifest.get(source)
+        if done and done["fingerprint"] == entry["fingerprint"] and done.get("clean_mode") == mode:
+            continue
+        out_path = os.path.join(output_dir, entry["shard"])
+        chars = removed = 0
+        with open(f"{out_path}.tmp", "w", encoding="utf-8") as out:
+            for record in iter_records(os.path.join(input_dir, entry["shard"])):
+                text = record.get("text") or ""
+                record["text"] = clean_text(text, mode)
+                chars += len(record["text"])
+                removed += len(text) - len(record["text"])
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(f"{out_path}.tmp", out_path)
+        cleaned_manifest[source] = {**entry, "chars": chars, "clean_mode": mode}
+        save_manifest(output_dir, cleaned_manifest)
+        print(f"[INFO] Cleaned '{source}': removed {removed} chars.")
+
+    print(f"[INFO] Successfully wrote cleaned shards to '{output_dir}'.")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Remove unwanted control characters from a JSON file of extracted text."
     )
-    parser.add_argument("input_json", help="Path to the input JSON file.")
-    parser.add_argument("output_json", help="Path to save the cleaned JSON file.")
+    parser.add_argument("input_json", help="Path to the input JSON file or shard directory.")
+    parser.add_argument("output_json", help="Path to save the cleaned JSON file or shards.")
+    parser.add_argument(
+        "--mode",
+        choices=["ascii", "unicode"],
+        default="ascii",
+        help="'ascii' keeps printable ASCII only (default); 'unicode' keeps all valid text.",
+    )
     args = parser.parse_args()
 
-    clean_json_file(args.input_json, args.output_json)
+    if os.path.isdir(args.input_json):
+        clean_shards(args.input_json, args.output_json, args.mode)
+    else:
+        clean_json_file(args.input_json, args.output_json, args.mode)
 
 
 if __name__ == "__main__":
@@ -1,20 +1,24 @@
-from langchain_huggingface import HuggingFaceEmbeddings
+import sys
+import os
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
 from langchain_community.vectorstores import Chroma
-from langchain_core.documents import Document
+import atexit
 import asyncio
-import torch
+import threading
+from concurrent.futures import wait
+from batching import MicroBatcher
+from RAG.embedding_registry import LazyEmbeddings
+from RAG.match_index import MatchIndex
 
 persist_directory = "User_Embeddings"
 collection_name = "interests"
-model_name = "sentence-transformers/all-mpnet-base-v2"
 
-# 1) Create embeddings using Hugging Face Sentence Transformer
-print(f"[INFO] Using model: {model_name}")
-embeddings = HuggingFaceEmbeddings(
-    model_name=model_name,
-    model_kwargs={"device": "cuda" if torch.cuda.is_available() else "cpu"},
-)
-#    ^ Change 'device' to 'cuda' if you have a GPU and the model supports it.
+# 1) Shared Hugging Face Sentence Transformer, loaded on the first upload
+embeddings = LazyEmbeddings()
 
 # 2) Convert the sentence into a Document
 
@@ -24,6 +28,131 @@ vectordb = Chroma(
     embedding_function=embeddings,
 )
 
+# 3) Incremental nearest-neighbour index over the same user vectors, shared
+#    by every worker through its files. Built from the collection on first use.
+match_index = MatchIndex(os.getenv("MATCH_INDEX_DIR", "User_Match_Index"))
+
+
+def _export_interests():
+    from RAG.pair_people import export_user_embeddings
+
+    user_ids, matrix, _ = export_user_embeddings(persist_directory, collection_name)
+    return [str(user_id) for user_id in user_ids], matrix
+
+
+if vectordb._collection.count() and match_index.build_if_empty(_export_interests):
+    print(f"[INFO] Built the match index from {len(match_index)} users in '{collection_name}'.")
+
+
+def user_doc_id(user_id) -> str:
+    """Deterministic document id, so each user has exactly one vector."""
+    return f"user-{user_id}"
+
+
+class UserEmbeddingWriter:
+    """
+    Write-behind batcher for user interest uploads. Concurrent uploads are
+    collected for up to `flush_ms` (or `max_batch_size` uploads), then
+    embedded in one forward pass, upserted by user id in one call and
+    persisted once. Within a batch the last upload of a user wins.
+
+    With `durable`, callers return only after their batch is persisted (and
+    the match index log fsynced). Without it they return once queued; a
+    crash can then lose up to one flush interval of uploads, and pending
+    batches are flushed at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        vectordb,
+        embeddings,
+        match_index: MatchIndex = None,
+        max_batch_size: int = 64,
+        flush_ms: float = 50.0,
+        durable: bool = True,
+    ):
+        self.vectordb = vectordb
+        self.embeddings = embeddings
+        self.match_index = match_index
+        self.durable = durable
+        self.persists = 0
+        self.batcher = MicroBatcher(
+            self._write_batch, max_batch_size=max_batch_size, max_wait_ms=flush_ms, name="user-embeds"
+        )
+        self._pending = set()
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def _write_batch(self, items):
+        latest = {}
+        for user_id, text in items:
+            latest[user_id] = text
+        user_ids = list(latest)
+        texts = [latest[user_id] for user_id in user_ids]
+        vectors = self.embeddings.embed_documents(texts)
+        ids = [user_doc_id(user_id) for user_id in user_ids]
+
+        collection = self.vectordb._collection
+        # Older uploads were stored under random ids; drop those duplicates.
+        existing = collection.get(where={"user_id": {"$in": user_ids}}, include=[])["ids"]
+        stale = set(existing) - set(ids)
+        if stale:
+            collection.delete(ids=list(stale))
+        collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            documents=texts,
+            metadatas=[{"user_id": user_id} for user_id in user_ids],
+        )
+        self.vectordb.persist()
+        self.persists += 1
+        if self.match_index is not None:
+            # Index keys are strings, so "5" and 5 name the same user.
+            self.match_index.upsert_many([str(u) for u in user_ids], vectors, sync=self.durable)
+        return [None] * len(items)
+
+    def _track(self, future):
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+        if not future.cancelled() and future.exception() is not None and not self.durable:
+            print(f"[WARNING] Failed to store user interests: {future.exception()}")
+
+    def submit(self, user_id, user_interests: str) -> None:
+        future = self.batcher.submit((user_id, user_interests))
+        self._track(future)
+        if self.durable:
+            future.result()
+
+    async def asubmit(self, user_id, user_interests: str) -> None:
+        future = self.batcher.submit((user_id, user_interests))
+        self._track(future)
+        if self.durable:
+            await asyncio.wrap_future(future)
+
+    def flush(self, timeout: float = None) -> None:
+        """Wait until every queued upload has been written."""
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending, timeout=timeout)
+
+    def stats(self) -> dict:
+        return {**self.batcher.stats(), "persists": self.persists, "pending": len(self._pending)}
+
+
+writer = UserEmbeddingWriter(
+    vectordb,
+    embeddings,
+    match_index,
+    max_batch_size=int(os.getenv("USER_EMBED_BATCH_SIZE", 64)),
+    flush_ms=float(os.getenv("USER_EMBED_FLUSH_MS", 50)),
+    durable=os.getenv("USER_EMBED_DURABLE", "1") == "1",
+)
+
 
 async def upload_interests_to_rag(
     user_interests: str,
@@ -31,20 +160,24 @@ async def upload_interests_to_rag(
 ):
     """
     Ingests a single user sentence into a Chroma DB as part of a Retrieval-Augmented Generation (RAG) setup.
+    The user's vector is upserted under a deterministic id, batched with
+    concurrent uploads, and mirrored into the match index.
     """
+    await writer.asubmit(user_id, user_interests)
 
-    doc = Document(page_content=user_interests, metadata={"user_id": user_id})
-    loop = asyncio.get_event_loop()
+    action = "added your sentence to" if writer.durable else "queued your sentence for"
+    print(f"[INFO] Successfully {action} the RAG collection '{collection_name}'.")
 
-    # Add the new document to the vector store (in a background thread)
-    await loop.run_in_executor(None, vectordb.add_documents, [doc])
 
-    # Persist to disk so it can be reused later (also in a background thread)
-    await loop.run_in_executor(None, vectordb.persist)
-
-    print(
-        f"[INFO] Successfully added your sentence to the RAG collection '{collection_name}'."
-    )
+def find_similar_users(user_id, k: int = 10):
+    """
+    The k users most similar to `user_id` as [{"user_id", "similarity"}].
+    Raises KeyError for a user who has not uploaded interests.
+    """
+    return [
+        {"user_id": other, "similarity": similarity}
+        for other, similarity in match_index.similar(str(user_id), k=k)
+    ]
 
 
 async def __main__():
@@ -0,0 +1,184 @@
+import sys
+import os
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import time
+import argparse
+import numpy as np
+from RAG.chunk_store import ChunkStore, ChunkStoreWriter, replace_store
+from RAG.lexical_index import build_lexical_index
+
+VECTORS_FILE = "vectors.npy"
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def export_from_chroma(
+    persist_dir: str = "books_chroma_db",
+    collection_name: str = "rag_docs",
+    out_dir: str = "books_index",
+    page_size: int = 5000,
+):
+    """
+    Export a Chroma collection once into a read-optimised index directory: a
+    contiguous, L2-normalised float32 matrix (vectors.npy) plus a
+    memory-mapped chunk store in the same row order. The index is written
+    next to `out_dir` and swapped in, so processes that have the old one
+    mapped keep reading it.
+    """
+    import chromadb
+
+    client = chromadb.PersistentClient(path=persist_dir)
+    collection = client.get_collection(collection_name)
+    total = collection.count()
+    print(f"[INFO] Exporting {total} chunks from '{persist_dir}/{collection_name}'.")
+
+    tmp_dir = f"{out_dir}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    vectors = None
+    row = 0
+    with ChunkStoreWriter(tmp_dir) as store:
+        for offset in range(0, total, page_size):
+            page = collection.get(
+                limit=page_size,
+                offset=offset,
+                include=["embeddings", "documents", "metadatas"],
+            )
+            embeddings = np.asarray(page["embeddings"], dtype=np.float32)
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(
+                    os.path.join(tmp_dir, VECTORS_FILE),
+                    mode="w+",
+                    dtype=np.float32,
+                    shape=(total, embeddings.shape[1]),
+                )
+            vectors[row : row + len(embeddings)] = normalize_rows(embeddings)
+            for chunk_id, text, metadata in zip(
+                page["ids"], page["documents"], page["metadatas"]
+            ):
+                store.add(chunk_id, text or "", metadata)
+            row += len(embeddings)
+    if vectors is not None:
+        vectors.flush()
+        del vectors
+    build_lexical_index(tmp_dir)
+    replace_store(tmp_dir, out_dir)
+    print(f"[INFO] Wrote {row} vectors and chunks to '{out_dir}'.")
+
+
+class DenseIndex:
+    """
+    Exact top-k cosine search over a memory-mapped float32 matrix. One
+    matrix-vector product per query, with no per-query database round trip.
+    Results are LangChain Documents, like Chroma returns.
+    """
+
+    def __init__(self, index_dir: str = "books_index"):
+        self.vectors = np.load(os.path.join(index_dir, VECTORS_FILE), mmap_mode="r")
+        self.store = ChunkStore(index_dir)
+
+    @staticmethod
+    def exists(index_dir: str) -> bool:
+        return os.path.isfile(os.path.join(index_dir, VECTORS_FILE))
+
+    def search(self, vector, k: int = 2):
+        """Return [(row, cosine similarity)] of the k nearest chunks, best first."""
+        query = np.array(vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        scores = self.vectors @ query
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
+
+    def similarity_search_by_vector(self, embedding, k: int = 2):
+        return [self.store.document(row) for row, _ in self.search(embedding, k)]
+
+    def similarity_search_with_score_by_vector(self, embedding, k: int = 2):
+        return [(self.store.document(row), score) for row, score in self.search(embedding, k)]
+
+    def vectors_for_ids(self, chunk_ids) -> dict:
+        """Normalised vectors of the given chunks, by id."""
+        rows = {chunk_id: self.store.row_of(chunk_id) for chunk_id in chunk_ids}
+        return {chunk_id: self.vectors[row] for chunk_id, row in rows.items() if row is not None}
+
+
+def evaluate(persist_dir, collection_name, index_dir, k, queries):
+    """Recall@k of the dense index against Chroma, and per-query search latency."""
+    from langchain_chroma import Chroma
+    from RAG.embedding_service import get_embedding_service
+
+    embeddings = get_embedding_service()
+    chroma = Chroma(
+        persist_directory=persist_dir,
+        collection_name=collection_name,
+        embedding_function=embeddings,
+    )
+    index = DenseIndex(index_dir)
+
+    recalls, chroma_times, dense_times = [], [], []
+    for query in queries:
+        vector = embeddings.embed_query(query)
+        start = time.perf_counter()
+        expected = chroma.similarity_search_by_vector(vector, k=k)
+        chroma_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        found = index.similarity_search_by_vector(vector, k=k)
+        dense_times.append(time.perf_counter() - start)
+        expected_ids = {doc.id for doc in expected}
+        recalls.append(len(expected_ids & {doc.id for doc in found}) / max(1, len(expected_ids)))
+
+    print(f"[INFO] Recall@{k} vs Chroma over {len(queries)} queries: {np.mean(recalls):.3f}")
+    for name, times in (("chroma", chroma_times), ("dense", dense_times)):
+        print(
+            f"[INFO] {name:>6} search p50 {np.percentile(times, 50) * 1000:.2f}ms "
+            f"p99 {np.percentile(times, 99) * 1000:.2f}ms"
+        )
+
+
+EVAL_QUERIES = [
+    "How do I go about the loss of someone?",
+    "I feel anxious all the time",
+    "my partner and I keep fighting",
+    "I can't stop drinking",
+    "how do I deal with negative thoughts",
+    "I feel lonely",
+    "my child has tantrums at school",
+    "I can't sleep because of stress",
+    "how can I be more confident at work",
+    "I think I have ADHD",
+    "my brother was diagnosed with schizophrenia",
+    "I am afraid of being abandoned",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export the books Chroma collection into a memory-mapped dense index."
+    )
+    parser.add_argument("--persist_dir", default="books_chroma_db")
+    parser.add_argument("--collection_name", default="rag_docs")
+    parser.add_argument("--out_dir", default="books_index")
+    parser.add_argument("--page_size", type=int, default=5000)
+    parser.add_argument("--skip_export", action="store_true")
+    parser.add_argument("--evaluate", action="store_true")
+    parser.add_argument("--k", type=int, default=2)
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        export_from_chroma(args.persist_dir, args.collection_name, args.out_dir, args.page_size)
+    if args.evaluate:
+        evaluate(args.persist_dir, args.collection_name, args.out_dir, args.k, EVAL_QUERIES)
+
+
+if __name__ == "__main__":
+    main()
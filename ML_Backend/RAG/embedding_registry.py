@@ -0,0 +1,87 @@
+import os
+import time
+import threading
+
+import torch
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface import HuggingFaceEmbeddings
+
+DEFAULT_MODEL = "sentence-transformers/all-mpnet-base-v2"
+
+_models = {}  # (model_name, device) -> HuggingFaceEmbeddings
+_stats = {}  # (model_name, device) -> load statistics
+_lock = threading.Lock()
+
+
+def default_device() -> str:
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _rss_bytes() -> int:
+    """Resident set size of this process (Linux), 0 where unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def get_embeddings(model_name: str = DEFAULT_MODEL, device: str = None) -> HuggingFaceEmbeddings:
+    """
+    Process-wide embedding model: loaded once, on first use, and shared by
+    every RAG module. Safe to call from several threads at once.
+    """
+    key = (model_name, device or default_device())
+    embeddings = _models.get(key)
+    if embeddings is not None:
+        return embeddings
+
+    with _lock:
+        embeddings = _models.get(key)
+        if embeddings is None:
+            print(f"[INFO] Loading embedding model: {model_name} on {key[1]}")
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            embeddings = HuggingFaceEmbeddings(
+                model_name=model_name, model_kwargs={"device": key[1]}
+            )
+            load_seconds = time.perf_counter() - start
+            parameter_bytes = sum(
+                p.numel() * p.element_size() for p in embeddings._client.parameters()
+            )
+            _stats[key] = {
+                "model_name": model_name,
+                "device": key[1],
+                "load_seconds": load_seconds,
+                "parameter_bytes": parameter_bytes,
+                "rss_delta_bytes": _rss_bytes() - rss_before,
+            }
+            print(
+                f"[INFO] Loaded {model_name} in {load_seconds:.1f}s "
+                f"({parameter_bytes / 2**20:.0f} MB of parameters)"
+            )
+            _models[key] = embeddings
+    return embeddings
+
+
+class LazyEmbeddings(Embeddings):
+    """
+    Embeddings handle for vector stores created at import time: the shared
+    model is only loaded when something is actually embedded.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, device: str = None):
+        self.model_name = model_name
+        self.device = device
+
+    def embed_documents(self, texts):
+        return get_embeddings(self.model_name, self.device).embed_documents(texts)
+
+    def embed_query(self, text):
+        return get_embeddings(self.model_name, self.device).embed_query(text)
+
+
+def registry_stats() -> list:
+    """Load time and memory of every model loaded so far."""
+    with _lock:
+        return list(_stats.values())
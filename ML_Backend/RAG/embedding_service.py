@@ -0,0 +1,114 @@
+import re
+import threading
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+from batching import MicroBatcher
+from RAG.embedding_registry import DEFAULT_MODEL, get_embeddings
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class EmbeddingService(Embeddings):
+    """
+    Query embeddings on top of the shared model from the registry.
+
+    Vectors are kept in an LRU cache keyed by the whitespace-normalised text,
+    and concurrent cache misses (from threads or event loops) are coalesced
+    into one batched forward pass by a MicroBatcher. `aembed_query` awaits the
+    batch without blocking the loop. `embed_documents` (used by ingestion)
+    goes straight to the model.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        device: str = None,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+        cache_size: int = 4096,
+    ):
+        self.model_name = model_name
+        self.device = device
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._batcher = MicroBatcher(
+            self._embed_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            name="embedding-batcher",
+        )
+
+    def _embed_batch(self, texts):
+        # Identical queries that arrive together are embedded once.
+        unique = list(dict.fromkeys(texts))
+        vectors = get_embeddings(self.model_name, self.device).embed_documents(unique)
+        by_text = dict(zip(unique, vectors))
+        return [by_text[t] for t in texts]
+
+    def _lookup(self, key):
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return vector
+
+    def _store(self, key, vector):
+        with self._lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def embed_query(self, text):
+        key = normalize_text(text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = self._batcher(key)
+            self._store(key, vector)
+        return vector
+
+    async def aembed_query(self, text):
+        key = normalize_text(text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = await self._batcher.asubmit(key)
+            self._store(key, vector)
+        return vector
+
+    def embed_documents(self, texts):
+        return get_embeddings(self.model_name, self.device).embed_documents(texts)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "cached": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+        stats.update(self._batcher.stats())
+        return stats
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Process-wide query embedding service."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = EmbeddingService()
+    return _service
@@ -0,0 +1,93 @@
+import sys
+import os
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import json
+import time
+import argparse
+from turn_records import approx_token_count
+from RAG.hybrid_search import CrossEncoderReranker, HybridRetriever
+from RAG.dense_index import DenseIndex
+
+QUERIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval_queries.json")
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def evaluate(search, queries, vectors, k, repeat):
+    """
+    hit@k over on-topic queries (a result comes from a relevant book),
+    abstain rate over off-topic ones (nothing returned), context tokens per
+    query and search latency (query embedding excluded).
+    """
+    hits = on_topic = abstained = off_topic = 0
+    tokens, latencies = [], []
+    for item, vector in zip(queries, vectors):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            docs = search(item["query"], vector, k)
+            latencies.append(time.perf_counter() - start)
+        sources = [doc.metadata.get("source", "") for doc in docs]
+        tokens.append(approx_token_count("\n\n".join(doc.page_content for doc in docs)))
+        if item["relevant"]:
+            on_topic += 1
+            hits += any(rel in source for rel in item["relevant"] for source in sources)
+        else:
+            off_topic += 1
+            abstained += not docs
+    return {
+        f"hit@{k}": hits / max(1, on_topic),
+        "abstain": abstained / max(1, off_topic),
+        "ctx_tokens": sum(tokens) / len(tokens),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recall and latency of dense vs hybrid book retrieval on a labelled query set."
+    )
+    parser.add_argument("--queries", default=QUERIES_FILE)
+    parser.add_argument("--k", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min_similarity", type=float, default=0.25)
+    parser.add_argument("--rerank_model", default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    parser.add_argument("--rerank_budget_ms", type=float, default=150.0)
+    parser.add_argument("--skip_rerank", action="store_true")
+    args = parser.parse_args()
+
+    from RAG.retreive_books import chunk_store_dir, embeddings, index_dir, search_backend
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+    vectors = [embeddings.embed_query(item["query"]) for item in queries]
+
+    lexical_dir = index_dir if isinstance(search_backend, DenseIndex) else chunk_store_dir
+    modes = {
+        "dense": lambda q, v, k: search_backend.similarity_search_by_vector(v, k=k),
+        "hybrid": HybridRetriever(
+            search_backend, lexical_dir, min_similarity=args.min_similarity
+        ).search,
+    }
+    if not args.skip_rerank:
+        reranker = CrossEncoderReranker(args.rerank_model, budget_ms=args.rerank_budget_ms)
+        modes["hybrid+rerank"] = HybridRetriever(
+            search_backend, lexical_dir, min_similarity=args.min_similarity, reranker=reranker
+        ).search
+        modes["hybrid+rerank"](queries[0]["query"], vectors[0], args.k)  # load the model
+
+    print(f"[INFO] {len(queries)} labelled queries, k={args.k}.")
+    for name, search in modes.items():
+        metrics = evaluate(search, queries, vectors, args.k, args.repeat)
+        print(f"{name:>14}: " + "  ".join(f"{key} {value:.2f}" for key, value in metrics.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,22 @@ import sys
 import json
 import argparse
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
 
 from pypdf import PdfReader
 from ebooklib import epub, ITEM_DOCUMENT
 from bs4 import BeautifulSoup
+from RAG.clean_json_text import clean_text
+from RAG.book_shards import (
+    file_fingerprint,
+    load_manifest,
+    save_manifest,
+    shard_name,
+)
 
 
 def extract_text_from_pdf(pdf_path):
@@ -48,18 +60,14 @@ def extract_text_from_epub(epub_path):
     return full_text
 
 
-def find_surrogates(text):
-    """Return a list of all surrogate characters in 'text'."""
-    return [ch for ch in text if 0xD800 <= ord(ch) <= 0xDFFF]
-
-
 def remove_surrogates(text):
     """
-    Remove surrogate characters entirely.
+    Remove surrogate characters and control characters in one pass over the
+    UTF-8 buffer (see clean_json_text.clean_text).
     Alternatively, you can use .encode('utf-8', 'replace').decode('utf-8')
-    if you'd prefer to replace them with � instead.
+    if you'd prefer to replace surrogates with � instead.
     """
-    return "".join(ch for ch in text if not (0xD800 <= ord(ch) <= 0xDFFF))
+    return clean_text(text, mode="unicode")
 
 
 def process_files(input_folder, output_json):
@@ -90,22 +98,16 @@ def process_files(input_folder, output_json):
         else:  # .epub
             raw_text = extract_text_from_epub(file_path)
 
-        # 2c. Debug: Check surrogates before cleaning
-        surrogates_found = find_surrogates(raw_text)
-        print(
-            f"[DEBUG] '{file_path.name}' => Surrogates found (before cleaning): {len(surrogates_found)}"
-        )
-
-        # 2d. Remove surrogate characters
+        # 2c. Remove surrogate and control characters
         cleaned_text = remove_surrogates(raw_text)
 
-        # 2e. Debug: Check surrogates after cleaning
-        surrogates_after = find_surrogates(cleaned_text)
+        # 2d. Debug: Report what cleaning removed
         print(
-            f"[DEBUG] '{file_path.name}' => Surrogates found (after cleaning): {len(surrogates_after)}"
+            f"[DEBUG] '{file_path.name}' => Surrogate/control chars removed: "
+            f"{len(raw_text) - len(cleaned_text)}"
         )
 
-        # 2f. Store result in dictionary
+        # 2e. Store result in dictionary
         extracted_data[file_path.name] = cleaned_text
         print(
             f"[INFO] Processed '{file_path.name}', final length: {len(cleaned_text)} chars\n"
@@ -124,13 +126,170 @@ def process_files(input_folder, output_json):
         )
 
 
+def extract_pdf_range(pdf_path, start, end, part_path):
+    """
+    Worker: extract pages [start, end) of a PDF into a JSONL part file, one
+    record per page. Returns the number of characters written.
+    """
+    chars = 0
+    with open(pdf_path, "rb") as file, open(part_path, "w", encoding="utf-8") as out:
+        reader = PdfReader(file)
+        for page_index in range(start, end):
+            text = remove_surrogates(reader.pages[page_index].extract_text() or "")
+            record = {"source": Path(pdf_path).name, "page": page_index + 1, "text": text}
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            chars += len(text)
+    return chars
+
+
+def extract_epub_chapters(epub_path, part_path):
+    """Worker: extract an EPUB into a JSONL part file, one record per chapter."""
+    chars = 0
+    book = epub.read_epub(epub_path)
+    with open(part_path, "w", encoding="utf-8") as out:
+        chapter_index = 0
+        for item in book.get_items():
+            if item.get_type() != ITEM_DOCUMENT:
+                continue
+            soup = BeautifulSoup(item.content, "html.parser")
+            text = remove_surrogates(soup.get_text())
+            record = {
+                "source": Path(epub_path).name,
+                "chapter": item.get_name(),
+                "chapter_index": chapter_index,
+                "text": text,
+            }
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            chars += len(text)
+            chapter_index += 1
+    return chars
+
+
+def plan_tasks(file_path, pages_per_task):
+    """Split a book into independent extraction tasks: PDF page ranges, or the whole EPUB."""
+    if file_path.suffix.lower() == ".epub":
+        return [(extract_epub_chapters, (str(file_path),))]
+    with open(file_path, "rb") as file:
+        num_pages = len(PdfReader(file).pages)
+    return [
+        (extract_pdf_range, (str(file_path), start, min(start + pages_per_task, num_pages)))
+        for start in range(0, num_pages, pages_per_task)
+    ]
+
+
+def finish_book(shard_dir, book):
+    """Concatenate a book's part files, in order, into its shard and drop the parts."""
+    shard_path = os.path.join(shard_dir, shard_name(book["source"]))
+    tmp_path = f"{shard_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        for part_path in book["parts"]:
+            with open(part_path, "r", encoding="utf-8") as part:
+                for line in part:
+                    out.write(line)
+            os.remove(part_path)
+    os.replace(tmp_path, shard_path)
+
+
+def extract_to_shards(input_folder, shard_dir, workers=None, pages_per_task=50):
+    """
+    Extract every PDF and EPUB in 'input_folder' into per-book JSONL shards
+    under 'shard_dir' using a process pool. Work is split across files and
+    across PDF page ranges. A book is recorded in the manifest only once its
+    shard is complete, so an interrupted run resumes where it stopped and
+    books whose size and mtime are unchanged are skipped.
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    manifest = load_manifest(shard_dir)
+    print(f"[INFO] Loaded manifest from '{shard_dir}' with {len(manifest)} books.")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for file_path in sorted(Path(input_folder).rglob("*")):
+            if file_path.suffix.lower() not in [".pdf", ".epub"]:
+                continue  # Skip non-PDF/EPUB files
+
+            fingerprint = file_fingerprint(file_path)
+            entry = manifest.get(file_path.name)
+            if entry and entry["fingerprint"] == fingerprint and os.path.isfile(
+                os.path.join(shard_dir, entry["shard"])
+            ):
+                print(f"[INFO] Skipping '{file_path.name}' (already extracted).")
+                continue
+
+            try:
+                tasks = plan_tasks(file_path, pages_per_task)
+            except Exception as e:
+                print(f"[ERROR] Could not open '{file_path.name}': {e}")
+                continue
+            book = {
+                "source": file_path.name,
+                "fingerprint": fingerprint,
+                "parts": [],
+                "remaining": len(tasks),
+                "chars": 0,
+                "failed": False,
+            }
+            for i, (fn, fn_args) in enumerate(tasks):
+                part_path = os.path.join(shard_dir, f"{file_path.name}.part{i:05d}")
+                book["parts"].append(part_path)
+                futures[pool.submit(fn, *fn_args, part_path)] = book
+            print(f"[INFO] Queued '{file_path.name}' as {len(tasks)} task(s).")
+
+        for future in as_completed(futures):
+            book = futures[future]
+            try:
+                book["chars"] += future.result()
+            except Exception as e:
+                print(f"[ERROR] Extraction failed for '{book['source']}': {e}")
+                book["failed"] = True
+            book["remaining"] -= 1
+            if book["remaining"]:
+                continue
+
+            if book["failed"]:
+                for part_path in book["parts"]:
+                    if os.path.isfile(part_path):
+                        os.remove(part_path)
+                continue
+            finish_book(shard_dir, book)
+            manifest[book["source"]] = {
+                "shard": shard_name(book["source"]),
+                "fingerprint": book["fingerprint"],
+                "chars": book["chars"],
+            }
+            save_manifest(shard_dir, manifest)
+            print(f"[INFO] Extracted '{book['source']}': {book['chars']} chars.")
+
+    print(f"[INFO] ✅ Done! {len(manifest)} books in '{shard_dir}'.")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Extract text from PDF & EPUB files.")
     parser.add_argument("input_folder", help="Folder containing PDF & EPUB files")
-    parser.add_argument("output_json", help="Output JSON file to save extracted text")
+    parser.add_argument(
+        "output",
+        help="Output JSON file, or the shard directory when --shards is given",
+    )
+    parser.add_argument(
+        "--shards",
+        action="store_true",
+        help="Extract in parallel into per-book JSONL shards with a resumable manifest.",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes. Defaults to CPU count."
+    )
+    parser.add_argument(
+        "--pages_per_task",
+        type=int,
+        default=50,
+        help="PDF pages per extraction task. Defaults to 50.",
+    )
     args = parser.parse_args()
 
-    process_files(args.input_folder, args.output_json)
+    if args.shards:
+        extract_to_shards(args.input_folder, args.output, args.workers, args.pages_per_task)
+    else:
+        process_files(args.input_folder, args.output)
 
 
 if __name__ == "__main__":
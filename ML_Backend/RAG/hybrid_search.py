@@ -0,0 +1,141 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import numpy as np
+from RAG.chunk_store import ChunkStore
+from RAG.lexical_index import LexicalIndex
+
+
+def reciprocal_rank_fusion(rankings, k: int = 60):
+    """Fuse ranked id lists: score(id) = sum over lists of 1 / (k + rank)."""
+    scores = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class CrossEncoderReranker:
+    """
+    CPU cross-encoder rerank under a latency budget. The number of pairs
+    scored is capped from the measured per-pair cost, and if a call still
+    overruns the budget its result is dropped and the caller keeps the fused
+    order. Calls otherwise queue on one scoring thread; only while a call
+    that overran is still scoring do later queries skip the rerank.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        budget_ms: float = 150.0,
+        device: str = "cpu",
+    ):
+        self.model_name = model_name
+        self.budget = budget_ms / 1000
+        self.device = device
+        self.per_pair = None  # seconds, moving average
+        self.timeouts = 0
+        self.skipped = 0
+        self._overrun = None  # future of the last call that timed out
+        self._model = None
+        self._lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+
+                    self._model = CrossEncoder(self.model_name, device=self.device)
+        return self._model
+
+    def _predict(self, query, texts):
+        start = time.perf_counter()
+        scores = self._get_model().predict([(query, text) for text in texts])
+        per_pair = (time.perf_counter() - start) / max(1, len(texts))
+        self.per_pair = per_pair if self.per_pair is None else 0.8 * self.per_pair + 0.2 * per_pair
+        return [float(score) for score in scores]
+
+    def rerank(self, query, docs):
+        """Return [(doc, score)] best first, or None when over budget."""
+        with self._submit_lock:
+            if self._overrun is not None and not self._overrun.done():
+                self.skipped += 1
+                return None
+            if self.per_pair:
+                docs = docs[: max(1, int(self.budget / self.per_pair))]
+            future = self._executor.submit(
+                self._predict, query, [doc.page_content for doc in docs]
+            )
+        try:
+            scores = future.result(timeout=self.budget if self._model is not None else None)
+        except TimeoutError:
+            with self._submit_lock:
+                self.timeouts += 1
+                self._overrun = future
+            return None
+        return sorted(zip(docs, scores), key=lambda pair: pair[1], reverse=True)
+
+
+class HybridRetriever:
+    """
+    Dense + BM25 retrieval fused by reciprocal rank. Candidates below
+    `min_similarity` (cosine to the query) are dropped, so weak hits are not
+    pasted into the prompt; with a reranker, candidates are reordered and
+    those scoring below `min_rerank_score` are dropped as well. May return
+    fewer than k documents, or none.
+
+    `dense` is a DenseIndex or ChromaChunkSearch; `store_dir` is the chunk
+    store holding the lexical index built at ingest.
+    """
+
+    def __init__(
+        self,
+        dense,
+        store_dir: str,
+        candidates: int = 20,
+        min_similarity: float = 0.25,
+        reranker: CrossEncoderReranker = None,
+        min_rerank_score: float = 0.0,
+    ):
+        self.dense = dense
+        self.store = ChunkStore(store_dir)
+        self.lexical = LexicalIndex(store_dir)
+        self.candidates = candidates
+        self.min_similarity = min_similarity
+        self.reranker = reranker
+        self.min_rerank_score = min_rerank_score
+
+    def search(self, query: str, vector, k: int = 2):
+        dense_docs = self.dense.similarity_search_by_vector(vector, k=self.candidates)
+        lexical_rows = [row for row, _ in self.lexical.search(query, k=self.candidates)]
+        docs = {doc.id: doc for doc in dense_docs}
+        for row in lexical_rows:
+            docs.setdefault(self.store.ids[row], None)
+
+        fused = reciprocal_rank_fusion(
+            [[doc.id for doc in dense_docs], [self.store.ids[row] for row in lexical_rows]]
+        )[: self.candidates]
+
+        # Relevance floor on cosine similarity, for dense and lexical hits alike.
+        query_vector = np.asarray(vector, dtype=np.float32)
+        query_vector = query_vector / (np.linalg.norm(query_vector) or 1.0)
+        vectors = self.dense.vectors_for_ids(fused)
+        kept = []
+        for chunk_id in fused:
+            chunk_vector = vectors.get(chunk_id)
+            if chunk_vector is None or float(chunk_vector @ query_vector) < self.min_similarity:
+                continue
+            doc = docs[chunk_id]
+            if doc is None:
+                doc = self.store.document(self.store.row_of(chunk_id))
+            kept.append(doc)
+
+        if self.reranker is not None and kept:
+            ranked = self.reranker.rerank(query, kept)
+            if ranked is not None:
+                return [doc for doc, score in ranked if score >= self.min_rerank_score][:k]
+        return kept[:k]
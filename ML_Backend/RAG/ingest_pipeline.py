@@ -0,0 +1,179 @@
+import time
+import queue
+import threading
+
+_DONE = object()
+
+
+class IngestPipeline:
+    """
+    Overlapping ingest stages joined by bounded queues:
+
+        caller (splitting)  ->  embed worker (batched)  ->  writer (bulk upsert)
+
+    `submit` buffers chunks into batches of `batch_size` and blocks when the
+    embed queue is full, so memory stays bounded however large the corpus is.
+    One thread feeds the forward passes while the caller keeps splitting and
+    the writer upserts earlier batches into the vector store in groups of
+    `write_batch_size`. With `workers` > 1 each batch is spread over a
+    SentenceTransformer multi-process pool (one model copy per process);
+    threads are not used for this because the shared model's fast tokenizer
+    is not safe to call concurrently.
+
+    `on_written` callbacks passed to `submit` run on the writer thread once
+    every chunk submitted up to and including that call is in the store, in
+    submission order.
+    """
+
+    def __init__(
+        self,
+        vectordb,
+        embeddings,
+        batch_size: int = 64,
+        queue_size: int = 8,
+        write_batch_size: int = 1024,
+        workers: int = 1,
+    ):
+        self.collection = vectordb._collection
+        self.embeddings = embeddings
+        self._pool = None
+        if workers > 1:
+            model = getattr(embeddings, "_client", None)
+            if hasattr(model, "start_multi_process_pool"):
+                devices = [str(model.device)] * workers
+                self._pool = model.start_multi_process_pool(target_devices=devices)
+            else:
+                print("[WARNING] Embeddings have no SentenceTransformer model; embedding in one process.")
+        self.batch_size = batch_size
+        self.write_batch_size = write_batch_size
+        self._pending = ([], [], [])
+        self._callbacks = []  # (chunks pending when submitted, callback)
+        self._embed_q = queue.Queue(maxsize=queue_size)
+        self._write_q = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self.chunks = 0
+        self.embed_seconds = 0.0
+        self.write_seconds = 0.0
+        self._started = time.perf_counter()
+        self._embedder = threading.Thread(target=self._embed_loop, name="ingest-embed", daemon=True)
+        self._writer = threading.Thread(target=self._write_loop, name="ingest-writer", daemon=True)
+        self._embedder.start()
+        self._writer.start()
+
+    def submit(self, ids, texts, metadatas, on_written=None) -> None:
+        if self._error is not None:
+            raise self._error
+        for buffer, values in zip(self._pending, (ids, texts, metadatas)):
+            buffer.extend(values)
+        if on_written is not None:
+            self._callbacks.append((len(self._pending[0]), on_written))
+        while len(self._pending[0]) >= self.batch_size:
+            self._put_batch(self.batch_size)
+
+    def _put_batch(self, size):
+        """Queue the first `size` pending chunks with the callbacks they complete."""
+        batch = tuple(buffer[:size] for buffer in self._pending)
+        for buffer in self._pending:
+            del buffer[:size]
+        callbacks = [callback for position, callback in self._callbacks if position <= size]
+        self._callbacks = [
+            (position - size, callback) for position, callback in self._callbacks if position > size
+        ]
+        self._embed_q.put(batch + (callbacks,))
+
+    def close(self) -> dict:
+        """Flush every stage, wait for the writes and return throughput stats."""
+        if self._pending[0] or self._callbacks:
+            self._put_batch(len(self._pending[0]))
+        self._embed_q.put(_DONE)
+        self._embedder.join()
+        self._write_q.put(_DONE)
+        self._writer.join()
+        if self._pool is not None:
+            self.embeddings._client.stop_multi_process_pool(self._pool)
+            self._pool = None
+        if self._error is not None:
+            raise self._error
+        return self.stats()
+
+    def stats(self) -> dict:
+        elapsed = time.perf_counter() - self._started
+        return {
+            "chunks": self.chunks,
+            "seconds": elapsed,
+            "chunks_per_sec": self.chunks / elapsed if elapsed else 0.0,
+            "embed_seconds": self.embed_seconds,
+            "write_seconds": self.write_seconds,
+        }
+
+    def _embed_loop(self):
+        while True:
+            batch = self._embed_q.get()
+            if batch is _DONE:
+                return
+            if self._error is not None:
+                continue  # keep draining so the caller never blocks on a dead stage
+            ids, texts, metadatas, callbacks = batch
+            try:
+                start = time.perf_counter()
+                vectors = self._embed(texts) if texts else []
+                self.embed_seconds += time.perf_counter() - start
+                self._write_q.put((ids, texts, metadatas, vectors, callbacks))
+            except Exception as e:
+                self._error = e
+
+    def _embed(self, texts):
+        if self._pool is None:
+            return self.embeddings.embed_documents(texts)
+        # Same preprocessing and encode settings as HuggingFaceEmbeddings.embed_documents.
+        texts = [text.replace("\n", " ") for text in texts]
+        workers = len(self._pool["processes"])
+        vectors = self.embeddings._client.encode_multi_process(
+            texts,
+            self._pool,
+            chunk_size=max(1, -(-len(texts) // workers)),
+            **self.embeddings.encode_kwargs,
+        )
+        return vectors.tolist()
+
+    def _write_loop(self):
+        buffered = ([], [], [], [])
+        callbacks = []
+        while True:
+            batch = self._write_q.get()
+            done = batch is _DONE
+            if not done and self._error is None:
+                for buffer, values in zip(buffered, batch[:4]):
+                    buffer.extend(values)
+                callbacks.extend(batch[4])
+            if done or len(buffered[0]) >= self.write_batch_size:
+                if buffered[0]:
+                    self._flush(*buffered)
+                    buffered = ([], [], [], [])
+                # Callbacks whose chunks are all buffered have now been written.
+                self._run_callbacks(callbacks)
+                callbacks = []
+            if done:
+                return
+
+    def _run_callbacks(self, callbacks):
+        for callback in callbacks:
+            if self._error is not None:
+                return
+            try:
+                callback()
+            except Exception as e:
+                self._error = e
+
+    def _flush(self, ids, texts, metadatas, vectors):
+        if self._error is not None:
+            return
+        try:
+            start = time.perf_counter()
+            self.collection.upsert(
+                ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas
+            )
+            self.write_seconds += time.perf_counter() - start
+            self.chunks += len(ids)
+        except Exception as e:
+            self._error = e
@@ -0,0 +1,106 @@
+import os
+import re
+import json
+from collections import Counter, defaultdict
+
+import numpy as np
+from RAG.chunk_store import ChunkStore
+
+VOCAB_FILE = "lexical_vocab.json"
+INDPTR_FILE = "lexical_indptr.npy"
+ROWS_FILE = "lexical_rows.npy"
+TF_FILE = "lexical_tf.npy"
+LENGTHS_FILE = "lexical_lengths.npy"
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = frozenset(
+    "a an and are as at be been but by can do for from had has have he her him his how i "
+    "if in into is it its just me my no not of on or our she so that the their them then "
+    "there they this to too was we were what when where which who why will with would you "
+    "your".split()
+)
+
+
+def tokenize(text: str):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def build_lexical_index(store_dir: str) -> None:
+    """
+    Build a BM25 inverted index over a chunk store, in the same directory and
+    row order. Postings are stored CSR-style: for term t, rows and term
+    frequencies live in [indptr[t], indptr[t + 1]).
+    """
+    store = ChunkStore(store_dir)
+    vocab = {}
+    postings = defaultdict(list)
+    lengths = np.zeros(len(store), dtype=np.int32)
+    for row in range(len(store)):
+        counts = Counter(tokenize(store.text(row)))
+        lengths[row] = sum(counts.values())
+        for term, tf in counts.items():
+            postings[vocab.setdefault(term, len(vocab))].append((row, tf))
+
+    indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    for term_id in range(len(vocab)):
+        indptr[term_id + 1] = indptr[term_id] + len(postings[term_id])
+    rows = np.empty(indptr[-1], dtype=np.int32)
+    tfs = np.empty(indptr[-1], dtype=np.float32)
+    for term_id, entries in postings.items():
+        start = indptr[term_id]
+        rows[start : start + len(entries)] = [row for row, _ in entries]
+        tfs[start : start + len(entries)] = [tf for _, tf in entries]
+
+    np.save(os.path.join(store_dir, INDPTR_FILE), indptr)
+    np.save(os.path.join(store_dir, ROWS_FILE), rows)
+    np.save(os.path.join(store_dir, TF_FILE), tfs)
+    np.save(os.path.join(store_dir, LENGTHS_FILE), lengths)
+    with open(os.path.join(store_dir, VOCAB_FILE), "w", encoding="utf-8") as f:
+        json.dump(vocab, f)
+    print(f"[INFO] Built lexical index over {len(store)} chunks ({len(vocab)} terms).")
+
+
+class LexicalIndex:
+    """
+    BM25 search over the inverted index built by build_lexical_index. Arrays
+    are memory mapped; a query touches only the postings of its own terms.
+    """
+
+    def __init__(self, store_dir: str, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.indptr = np.load(os.path.join(store_dir, INDPTR_FILE), mmap_mode="r")
+        self.rows = np.load(os.path.join(store_dir, ROWS_FILE), mmap_mode="r")
+        self.tfs = np.load(os.path.join(store_dir, TF_FILE), mmap_mode="r")
+        lengths = np.load(os.path.join(store_dir, LENGTHS_FILE)).astype(np.float32)
+        with open(os.path.join(store_dir, VOCAB_FILE), "r", encoding="utf-8") as f:
+            self.vocab = json.load(f)
+        self.num_docs = len(lengths)
+        # Per-row part of the BM25 denominator, precomputed once.
+        avg_length = float(lengths.mean()) if len(lengths) else 1.0
+        self._norm = k1 * (1 - b + b * lengths / max(avg_length, 1.0))
+
+    @staticmethod
+    def exists(store_dir: str) -> bool:
+        return os.path.isfile(os.path.join(store_dir, VOCAB_FILE))
+
+    def search(self, query: str, k: int = 20):
+        """Return [(row, bm25 score)] of the k best chunks, best first."""
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        matched = False
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            rows, tfs = self.rows[start:end], self.tfs[start:end]
+            df = end - start
+            idf = np.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            scores[rows] += idf * tfs * (self.k1 + 1) / (tfs + self._norm[rows])
+            matched = True
+        if not matched:
+            return []
+        k = min(k, int(np.count_nonzero(scores)))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
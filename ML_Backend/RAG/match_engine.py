@@ -0,0 +1,188 @@
+import os
+import heapq
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def normalize_matrix(vectors) -> np.ndarray:
+    """Contiguous float32 matrix with unit-length rows (zero rows stay zero)."""
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def to_matrix(user_id_to_embedding: dict):
+    """Split {user_id: embedding} into a user-id list and a normalised matrix."""
+    user_ids = list(user_id_to_embedding.keys())
+    matrix = normalize_matrix([user_id_to_embedding[uid] for uid in user_ids])
+    return user_ids, matrix
+
+
+def _push_tile(heap, tile, row_offset, col_offset, k):
+    """Merge the best entries of one similarity tile into a size-k min-heap."""
+    flat = tile.ravel()
+    floor = heap[0][0] if len(heap) >= k else -np.inf
+    candidates = np.flatnonzero(flat > floor)
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-flat[candidates], k - 1)[:k]]
+    rows, cols = np.unravel_index(candidates, tile.shape)
+    for r, c, sim in zip(rows, cols, flat[candidates]):
+        item = (float(sim), int(r) + row_offset, int(c) + col_offset)
+        if len(heap) < k:
+            heapq.heappush(heap, item)
+        elif item[0] > heap[0][0]:
+            heapq.heapreplace(heap, item)
+
+
+def _row_block_top_k(matrix, start, end, k, block_size, heap=None):
+    """Top-k pairs (i < j) whose first user is in rows [start, end)."""
+    heap = [] if heap is None else heap
+    rows = matrix[start:end]
+    for col_start in range(start, len(matrix), block_size):
+        col_end = min(col_start + block_size, len(matrix))
+        tile = rows @ matrix[col_start:col_end].T
+        if col_start < end:
+            # Keep only the upper triangle (i < j) where the blocks overlap.
+            i = np.arange(start, end)[:, None]
+            j = np.arange(col_start, col_end)[None, :]
+            tile[i >= j] = -np.inf
+        _push_tile(heap, tile, start, col_start, k)
+    return heap
+
+
+_worker_matrix = None
+
+
+def _init_worker(path):
+    global _worker_matrix
+    _worker_matrix = np.load(path, mmap_mode="r")
+
+
+def _worker_top_k(start, end, k, block_size):
+    return _row_block_top_k(_worker_matrix, start, end, k, block_size)
+
+
+def top_k_pairs(matrix: np.ndarray, k: int = 10, block_size: int = 2048, workers: int = 0):
+    """
+    Global top-k most similar pairs (i, j, similarity), i < j, best first, of
+    a row-normalised matrix. Similarities are computed one block_size x
+    block_size tile at a time and only each tile's best candidates reach the
+    heap, so the n x n matrix is never materialised.
+
+    With `workers` > 0, row blocks are spread over a process pool; workers
+    memory-map the matrix from an .npy file instead of receiving a copy.
+    """
+    n = len(matrix)
+    if n < 2 or k <= 0:
+        return []
+    blocks = [(start, min(start + block_size, n)) for start in range(0, n, block_size)]
+
+    if workers and len(blocks) > 1:
+        path = getattr(matrix, "filename", None)
+        tmp_path = None
+        if path is None or not str(path).endswith(".npy"):
+            fd, tmp_path = tempfile.mkstemp(suffix=".npy")
+            os.close(fd)
+            np.save(tmp_path, matrix)
+            path = tmp_path
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(path,)
+            ) as pool:
+                heaps = pool.map(
+                    _worker_top_k,
+                    [b[0] for b in blocks],
+                    [b[1] for b in blocks],
+                    [k] * len(blocks),
+                    [block_size] * len(blocks),
+                )
+                merged = [item for heap in heaps for item in heap]
+        finally:
+            if tmp_path:
+                os.remove(tmp_path)
+    else:
+        # One heap across all tiles, so its floor prunes later tiles early.
+        merged = []
+        for start, end in blocks:
+            _row_block_top_k(matrix, start, end, k, block_size, heap=merged)
+
+    best = heapq.nlargest(k, merged)
+    return [(i, j, sim) for sim, i, j in best]
+
+
+def knn_graph(matrix: np.ndarray, k: int = 32, block_size: int = 256):
+    """
+    Exact k-nearest-neighbour graph of a row-normalised matrix: (neighbors,
+    similarities), both (n, k), best first, self excluded. Rows are processed
+    block_size at a time, so memory is block_size x n floats.
+    """
+    n = len(matrix)
+    k = min(k, n - 1)
+    neighbors = np.empty((n, k), dtype=np.int64)
+    similarities = np.empty((n, k), dtype=np.float32)
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        tile = matrix[start:end] @ matrix.T
+        tile[np.arange(end - start), np.arange(start, end)] = -np.inf
+        idx = np.argpartition(-tile, k - 1, axis=1)[:, :k]
+        sims = np.take_along_axis(tile, idx, axis=1)
+        order = np.argsort(-sims, axis=1)
+        neighbors[start:end] = np.take_along_axis(idx, order, axis=1)
+        similarities[start:end] = np.take_along_axis(sims, order, axis=1)
+    return neighbors, similarities
+
+
+def form_groups(matrix: np.ndarray, group_size: int = 4, knn: int = 32, block_size: int = 256):
+    """
+    Partition users into groups of `group_size`, maximising mean intra-group
+    similarity, using only each user's kNN neighbourhood.
+
+    Anchors are visited most-connected first (highest mean kNN similarity),
+    so dense neighbourhoods become tight groups before their members are
+    spread across weaker ones. A group
+    grows by adding the unassigned candidate, from the members' neighbour
+    lists, with the highest mean similarity to the current members. Users
+    left without a full group are regrouped on a fresh kNN graph of the
+    remaining users; fewer than `group_size` leftovers stay unmatched.
+    Returns lists of row indices.
+    """
+    remaining = np.arange(len(matrix))
+    groups = []
+    while len(remaining) >= group_size:
+        sub = matrix[remaining]
+        neighbors, similarities = knn_graph(sub, max(knn, group_size - 1), block_size)
+        assigned = np.zeros(len(remaining), dtype=bool)
+        for anchor in np.argsort(-similarities.mean(axis=1)):
+            if assigned[anchor]:
+                continue
+            members = [anchor]
+            pool = {int(v) for v in neighbors[anchor] if not assigned[v]}
+            while len(members) < group_size and pool:
+                candidates = np.fromiter(pool, dtype=np.int64, count=len(pool))
+                scores = (sub[candidates] @ sub[members].T).mean(axis=1)
+                best = int(candidates[np.argmax(scores)])
+                members.append(best)
+                pool.discard(best)
+                pool.update(int(v) for v in neighbors[best] if not assigned[v] and v not in members)
+            if len(members) == group_size:
+                assigned[members] = True
+                groups.append(remaining[members].tolist())
+        remaining = remaining[~assigned]
+    return groups
+
+
+def mean_intra_group_similarity(matrix: np.ndarray, groups) -> float:
+    """Objective: average over groups of the mean pairwise cosine similarity."""
+    scores = []
+    for size in {len(group) for group in groups}:
+        if size < 2:
+            continue
+        members = np.asarray([group for group in groups if len(group) == size])
+        vectors = matrix[members]  # (groups, size, dim)
+        sims = vectors @ vectors.transpose(0, 2, 1)
+        off_diagonal = sims.sum(axis=(1, 2)) - np.trace(sims, axis1=1, axis2=2)
+        scores.extend(off_diagonal / (size * (size - 1)))
+    return float(np.mean(scores)) if scores else 0.0
@@ -0,0 +1,316 @@
+import sys
+import os
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import json
+import time
+import struct
+import argparse
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from RAG.match_engine import normalize_matrix, to_matrix
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): one process per index directory
+    fcntl = None
+
+SNAPSHOT_FILE = "match_snapshot.npz"
+LOG_FILE = "match_updates.log"
+LOCK_FILE = "match.lock"
+RECORD_HEADER = struct.Struct("<II")  # user-id JSON length, vector dimension
+
+
+class MatchIndex:
+    """
+    Persistent in-memory index of normalised user embeddings, one row per
+    user, for "top-k similar users" lookups (one matrix-vector product).
+
+    Updates are incremental: `upsert` overwrites the user's row, or appends
+    one, and appends a record to an update log instead of rewriting the
+    matrix. On load the snapshot is read and the log replayed; once the log
+    grows past `compact_every` records (or a quarter of the users) it is
+    folded into a new snapshot.
+
+    Several processes (e.g. gunicorn workers) can share one directory:
+    writes and compactions hold an exclusive file lock and first catch up on
+    the log, and lookups replay what other processes appended, or reload a
+    snapshot one of them wrote, under a shared lock.
+    """
+
+    def __init__(self, index_dir: str = "User_Match_Index", compact_every: int = 1024):
+        self.index_dir = index_dir
+        self.compact_every = compact_every
+        self.user_ids = []
+        self.row_of = {}
+        self.vectors = None  # (capacity, dim); rows past len(self) are spare
+        self.logged = 0
+        self._lock = threading.Lock()
+        self._snapshot_path = os.path.join(index_dir, SNAPSHOT_FILE)
+        self._log_path = os.path.join(index_dir, LOG_FILE)
+        self._stamp = None  # identity of the loaded snapshot file
+        self._offset = 0  # bytes of the log replayed so far
+        os.makedirs(index_dir, exist_ok=True)
+        self._lock_file = open(os.path.join(index_dir, LOCK_FILE), "a+b")
+        self._log = open(self._log_path, "ab")
+        with self._lock, self._locked(exclusive=True):
+            self._refresh(repair=True)
+            if self.logged > self._compact_threshold():
+                self._compact()
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def __contains__(self, user_id) -> bool:
+        return user_id in self.row_of
+
+    @property
+    def dim(self):
+        return None if self.vectors is None else self.vectors.shape[1]
+
+    @contextmanager
+    def _locked(self, exclusive: bool = False):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _snapshot_stamp(self):
+        try:
+            stat = os.stat(self._snapshot_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self, repair: bool = False):
+        """
+        Catch up with the files: reload after another process compacted,
+        then replay log records appended since the last call. With `repair`
+        (exclusive lock held), a torn record left by a crash is cut off.
+        """
+        stamp = self._snapshot_stamp()
+        log_size = os.path.getsize(self._log_path)
+        if stamp != self._stamp or log_size < self._offset:
+            self._load_snapshot()
+            self._stamp = stamp
+            self._offset = 0
+            self.logged = 0
+        if log_size == self._offset:
+            return
+
+        with open(self._log_path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            id_len, dim = RECORD_HEADER.unpack_from(data, offset)
+            end = offset + RECORD_HEADER.size + id_len + 4 * dim
+            if end > len(data):
+                break
+            start = offset + RECORD_HEADER.size
+            user_id = json.loads(data[start : start + id_len])
+            vector = np.frombuffer(data, dtype=np.float32, count=dim, offset=start + id_len)
+            self._set_row(user_id, vector)
+            self.logged += 1
+            offset = end
+        self._offset += offset
+        if offset < len(data) and repair:
+            # A torn record from an interrupted write: drop it.
+            print(f"[WARNING] Truncating {len(data) - offset} bytes of a partial match-index update.")
+            self._log.truncate(self._offset)
+
+    def _load_snapshot(self):
+        self.user_ids, self.row_of, self.vectors = [], {}, None
+        if self._snapshot_stamp() is None:
+            return
+        with np.load(self._snapshot_path) as snapshot:
+            vectors = np.array(snapshot["vectors"], dtype=np.float32)
+            self.user_ids = json.loads(str(snapshot["user_ids"]))
+        if self.user_ids:
+            self.vectors = vectors
+        self.row_of = {uid: row for row, uid in enumerate(self.user_ids)}
+
+    def _compact_threshold(self) -> int:
+        return max(self.compact_every, len(self) // 4)
+
+    def _set_row(self, user_id, vector):
+        row = self.row_of.get(user_id)
+        if row is None:
+            if self.vectors is None:
+                self.vectors = np.zeros((16, len(vector)), dtype=np.float32)
+            elif len(self) == len(self.vectors):
+                grown = np.zeros((2 * len(self.vectors), self.dim), dtype=np.float32)
+                grown[: len(self)] = self.vectors[: len(self)]
+                self.vectors = grown
+            row = len(self.user_ids)
+            self.user_ids.append(user_id)
+            self.row_of[user_id] = row
+        self.vectors[row] = vector
+
+    def upsert(self, user_id, embedding) -> None:
+        """Add or replace one user's embedding and append it to the update log."""
+        self.upsert_many([user_id], [embedding])
+
+    def upsert_many(self, user_ids, embeddings, sync: bool = False) -> None:
+        """
+        Add or replace several users with one log write. With `sync`, the log
+        is fsynced before returning.
+        """
+        if not len(user_ids):
+            return
+        vectors = normalize_matrix(embeddings)
+        records = []
+        for user_id, vector in zip(user_ids, vectors):
+            key = json.dumps(user_id).encode("utf-8")
+            records.append(RECORD_HEADER.pack(len(key), len(vector)) + key + vector.tobytes())
+        data = b"".join(records)
+        with self._lock, self._locked(exclusive=True):
+            self._refresh(repair=True)
+            if self.dim is not None and vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding has dimension {vectors.shape[1]}, index has {self.dim}.")
+            for user_id, vector in zip(user_ids, vectors):
+                self._set_row(user_id, vector)
+            self._log.write(data)
+            self._log.flush()
+            if sync:
+                os.fsync(self._log.fileno())
+            self._offset += len(data)
+            self.logged += len(records)
+            if self.logged > self._compact_threshold():
+                self._compact()
+
+    def similar_to_vector(self, embedding, k: int = 10, exclude=None):
+        """[(user_id, similarity)] of the k users most similar to `embedding`."""
+        query = normalize_matrix([embedding])[0]
+        with self._lock:
+            with self._locked():
+                self._refresh()
+            n = len(self)
+            matrix = self.vectors[:n] if n else None
+            user_ids = self.user_ids[:n]
+            excluded = self.row_of.get(exclude) if exclude is not None else None
+        if not n:
+            return []
+        scores = matrix @ query
+        if excluded is not None:
+            scores[excluded] = -np.inf
+        k = min(k, n - (excluded is not None))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(user_ids[row], float(scores[row])) for row in top]
+
+    def similar(self, user_id, k: int = 10):
+        """[(user_id, similarity)] of the k users most similar to `user_id`."""
+        with self._lock:
+            with self._locked():
+                self._refresh()
+            row = self.row_of.get(user_id)
+            if row is None:
+                raise KeyError(user_id)
+            vector = self.vectors[row].copy()
+        return self.similar_to_vector(vector, k=k, exclude=user_id)
+
+    def compact(self) -> None:
+        """Fold the update log into a new snapshot."""
+        with self._lock, self._locked(exclusive=True):
+            self._refresh(repair=True)
+            self._compact()
+
+    def _compact(self):
+        n = len(self)
+        tmp_path = self._snapshot_path + ".tmp.npz"
+        vectors = self.vectors[:n] if n else np.zeros((0, 0), dtype=np.float32)
+        np.savez(tmp_path, vectors=vectors, user_ids=np.array(json.dumps(self.user_ids)))
+        os.replace(tmp_path, self._snapshot_path)
+        # Replaying the log is idempotent, so a crash before this truncate is harmless.
+        self._log.truncate(0)
+        self._stamp = self._snapshot_stamp()
+        self._offset = 0
+        self.logged = 0
+
+    def rebuild(self, user_id_to_embedding: dict) -> None:
+        """Replace the whole index from {user_id: embedding}."""
+        if user_id_to_embedding:
+            self.load_matrix(*to_matrix(user_id_to_embedding))
+        else:
+            self.load_matrix([], None)
+
+    def load_matrix(self, user_ids, matrix) -> None:
+        """
+        Replace the whole index from a row-normalised matrix and parallel user
+        ids, e.g. from pair_people.export_user_embeddings.
+        """
+        with self._lock, self._locked(exclusive=True):
+            self._replace(user_ids, matrix)
+
+    def build_if_empty(self, export) -> bool:
+        """
+        If no process has indexed anyone yet, fill the index from `export()`,
+        which returns (user_ids, matrix) as for `load_matrix`. Returns
+        whether it did.
+        """
+        with self._lock, self._locked(exclusive=True):
+            self._refresh(repair=True)
+            if len(self):
+                return False
+            user_ids, matrix = export()
+            if not len(user_ids):
+                return False
+            self._replace(user_ids, matrix)
+            return True
+
+    def _replace(self, user_ids, matrix):
+        self.user_ids = list(user_ids)
+        self.vectors = np.array(matrix, dtype=np.float32) if self.user_ids else None
+        self.row_of = {uid: row for row, uid in enumerate(self.user_ids)}
+        self._compact()
+
+    def close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._lock_file.close()
+            self._log = None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the user match index from the interests collection, or query it."
+    )
+    parser.add_argument("--index_dir", default="User_Match_Index")
+    parser.add_argument("--persist_dir", default="User_Embeddings")
+    parser.add_argument("--collection_name", default="interests")
+    parser.add_argument("--rebuild", action="store_true")
+    parser.add_argument("--user_id", type=int, help="Print the users most similar to this one.")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    index = MatchIndex(args.index_dir)
+    if args.rebuild:
+        from RAG.pair_people import export_user_embeddings
+
+        user_ids, matrix, _ = export_user_embeddings(args.persist_dir, args.collection_name)
+        index.load_matrix(user_ids, matrix)
+        print(f"[INFO] Indexed {len(index)} users in '{args.index_dir}'.")
+    if args.user_id is not None:
+        start = time.perf_counter()
+        matches = index.similar(args.user_id, k=args.k)
+        elapsed = (time.perf_counter() - start) * 1000
+        for user_id, similarity in matches:
+            print(f"{user_id}\t{similarity:.4f}")
+        print(f"[INFO] {len(matches)} matches among {len(index)} users in {elapsed:.2f} ms.")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,123 +1,180 @@
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+import sys
+import os
 
-model_name = "sentence-transformers/all-mpnet-base-v2"
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
 
-# 1) Create embeddings using Hugging Face Sentence Transformer
-print(f"[INFO] Using model: {model_name}")
-embeddings = HuggingFaceEmbeddings(
-    model_name=model_name, model_kwargs={"device": "cpu"}
-)
+import json
+import argparse
+import numpy as np
+from langchain_community.vectorstores import Chroma
+from RAG.embedding_registry import LazyEmbeddings
+from RAG.match_engine import form_groups, normalize_matrix, to_matrix, top_k_pairs
 
+# 1) Shared Hugging Face Sentence Transformer. Pairing only reads stored
+#    vectors, so the model is never loaded here unless something is embedded.
+embeddings = LazyEmbeddings()
 
-def load_user_embeddings(
+
+def export_user_embeddings(
     persist_directory: str = "User_Embeddings",
     collection_name: str = "interests",
+    page_size: int = 5000,
+    out_path: str = None,
+    include_documents: bool = False,
+    normalize: bool = True,
 ):
     """
-    Returns a dict {user_id: embedding_vector} for each user.
+    Stream the collection page by page into one float32 matrix, one row per
+    user, without building Python lists of every vector.
+
+    Returns (user_ids, matrix, documents): user_ids is parallel to the rows;
+    documents is None unless `include_documents`. Rows are unit-length
+    unless `normalize` is False. With `out_path` (an .npy file) the matrix is
+    written there and returned memory-mapped, so top_k_pairs workers can map
+    the same file, and the user ids are saved next to it as *_ids.json.
+    A user's "user-{id}" document (see create_user_embeds.user_doc_id) wins
+    over copies left by older uploads under random ids.
     """
-    # 1) Initialize the Chroma DB
     vectordb = Chroma(
         collection_name=collection_name,
         persist_directory=persist_directory,
         embedding_function=embeddings,
     )
-
-    # 2) The Chroma internal collection object
     collection = vectordb._collection  # private API, but handy for direct data
+    total = collection.count()
+    include = ["embeddings", "metadatas"] + (["documents"] if include_documents else [])
+
+    matrix = None
+    user_ids, row_of = [], {}
+    documents = [] if include_documents else None
+    for offset in range(0, total, page_size):
+        page = collection.get(limit=page_size, offset=offset, include=include)
+        if not page["ids"]:
+            break
+        vectors = np.asarray(page["embeddings"], dtype=np.float32)
+        if normalize:
+            vectors = normalize_matrix(vectors)
+        if matrix is None:
+            shape = (total, vectors.shape[1])
+            if out_path:
+                matrix = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float32, shape=shape)
+            else:
+                matrix = np.empty(shape, dtype=np.float32)
+
+        rows, sources = [], []
+        for i, (doc_id, meta) in enumerate(zip(page["ids"], page["metadatas"])):
+            user_id = (meta or {}).get("user_id")
+            if user_id is None:
+                continue
+            row = row_of.get(user_id)
+            if row is None:
+                if len(user_ids) == total:
+                    continue  # added after the export started
+                row = row_of[user_id] = len(user_ids)
+                user_ids.append(user_id)
+                if documents is not None:
+                    documents.append(None)
+            elif doc_id != f"user-{user_id}":
+                continue
+            rows.append(row)
+            sources.append(i)
+            if documents is not None:
+                documents[row] = page["documents"][i]
+        if rows:
+            matrix[np.asarray(rows)] = vectors[np.asarray(sources)]
 
-    # 3) Get all embeddings and metadata
-    #    collection.get(...) can fetch embeddings, metadatas, and documents
-    results = collection.get(include=["embeddings", "metadatas", "documents"])
-
-    # 4) Convert into a user-friendly structure
-    #    results["embeddings"] is a list of vectors
-    #    results["metadatas"] is a list of dicts (like {"user_id": 123})
-    #    results["ids"] are internal IDs
-    user_id_to_embedding = {}
-    for embedding, meta in zip(results["embeddings"], results["metadatas"]):
-        user_id = meta.get("user_id")
-        if user_id is not None:
-            user_id_to_embedding[user_id] = embedding
+    n = len(user_ids)
+    if matrix is None:
+        matrix = np.zeros((0, 0), dtype=np.float32)
+    elif out_path:
+        if n < total:
+            # Duplicates or rows without a user id: rewrite at the exact size.
+            tmp_path = out_path + ".tmp.npy"
+            trimmed = np.lib.format.open_memmap(
+                tmp_path, mode="w+", dtype=np.float32, shape=(n, matrix.shape[1])
+            )
+            trimmed[:] = matrix[:n]
+            trimmed.flush()
+            del trimmed
+            del matrix
+            os.replace(tmp_path, out_path)
+        else:
+            matrix.flush()
+            del matrix
+        matrix = np.load(out_path, mmap_mode="r")
+    elif n < total:
+        matrix = matrix[:n]
+
+    if out_path:
+        with open(os.path.splitext(out_path)[0] + "_ids.json", "w", encoding="utf-8") as f:
+            json.dump(user_ids, f)
+    return user_ids, matrix, documents
 
-    return user_id_to_embedding
 
+def load_user_embeddings(
+    persist_directory: str = "User_Embeddings",
+    collection_name: str = "interests",
+):
+    """
+    Returns a dict {user_id: embedding_vector} for each user. The vectors
+    are rows of one float32 matrix from export_user_embeddings.
+    """
+    user_ids, matrix, _ = export_user_embeddings(
+        persist_directory, collection_name, normalize=False
+    )
+    return {user_id: matrix[row] for row, user_id in enumerate(user_ids)}
 
-import numpy as np
-import networkx as nx
 
+def pair_users(user_ids, matrix, top_k=10, block_size=2048, workers=0):
+    """
+    Top-k most similar pairs of users, given a row-normalised matrix and the
+    parallel user ids (as from export_user_embeddings).
 
-import numpy as np
-import networkx as nx
+    Rows are compared in blocked matrix multiplies (RAG/match_engine.py), so
+    the n x n similarity matrix is never built. `workers` > 0 spreads the
+    tiles over processes, which map an .npy-backed matrix directly.
+    """
+    pairs = top_k_pairs(matrix, k=top_k, block_size=block_size, workers=workers)
+    return [(user_ids[i], user_ids[j]) for i, j, _ in pairs]
 
 
-def pair_users_by_similarity(user_id_to_embedding: dict, top_k=10):
+def pair_users_by_similarity(
+    user_id_to_embedding: dict, top_k=10, block_size=2048, workers=0
+):
     """
     Takes {user_id: embedding_vector} and returns the top-k pairs of users
     that have the highest similarity.
     """
-    user_ids = list(user_id_to_embedding.keys())
-    embeddings = [user_id_to_embedding[uid] for uid in user_ids]
-    n = len(user_ids)
+    user_ids, matrix = to_matrix(user_id_to_embedding)
+    return pair_users(user_ids, matrix, top_k=top_k, block_size=block_size, workers=workers)
 
-    def cosine_similarity(a, b):
-        return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
 
-    # Create a list of (userA, userB, similarity)
-    similarities = []
-    for i in range(n):
-        for j in range(i + 1, n):
-            uid_i = user_ids[i]
-            uid_j = user_ids[j]
-            sim = cosine_similarity(embeddings[i], embeddings[j])
-            similarities.append((uid_i, uid_j, sim))
-
-    # Sort by similarity (highest first)
-    similarities.sort(key=lambda x: x[2], reverse=True)
+def group_user_matrix(user_ids, matrix, group_size=4, knn=32):
+    """
+    Form groups of `group_size` users with high mean similarity to each
+    other, using a kNN graph over a row-normalised matrix (see
+    match_engine.form_groups). Leftover users (fewer than `group_size`)
+    remain unmatched.
+    """
+    groups = form_groups(matrix, group_size=group_size, knn=knn)
+    return [[user_ids[i] for i in group] for group in groups]
 
-    # Select the top-k pairs
-    top_pairs = similarities[:top_k]
 
-    return [(user1, user2) for user1, user2, _ in top_pairs]
+def group_users(user_id_to_embedding: dict, group_size=4, knn=32):
+    """
+    Form groups of `group_size` users from {user_id: embedding_vector}.
+    """
+    user_ids, matrix = to_matrix(user_id_to_embedding)
+    return group_user_matrix(user_ids, matrix, group_size=group_size, knn=knn)
 
 
 def group_users_in_fours(user_id_to_embedding: dict):
     """
-    Greedily form groups of 4 based on average similarity to each other.
+    Form groups of 4 based on average similarity to each other.
     """
-    user_ids = list(user_id_to_embedding.keys())
-    embeddings = {uid: np.array(vec) for uid, vec in user_id_to_embedding.items()}
-
-    def cosine_similarity(a, b):
-        return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
-
-    groups = []
-
-    while len(user_ids) >= 4:
-        # 1) Pick the first user
-        anchor_user = user_ids[0]
-        anchor_emb = embeddings[anchor_user]
-
-        # 2) Compute similarity with all others
-        sims = []
-        for other in user_ids[1:]:
-            sim = cosine_similarity(anchor_emb, embeddings[other])
-            sims.append((other, sim))
-
-        # 3) Sort by similarity descending
-        sims.sort(key=lambda x: x[1], reverse=True)
-
-        # 4) Take top 3
-        top3 = [anchor_user] + [uid for (uid, _) in sims[:3]]
-        groups.append(top3)
-
-        # 5) Remove these 4 from user_ids
-        for uid in top3:
-            user_ids.remove(uid)
-
-    # If leftover users remain (less than 4), they remain unmatched
-    return groups
+    return group_users(user_id_to_embedding, group_size=4)
 
 
 # if __name__ == "__main__":
@@ -130,8 +187,18 @@ def group_users_in_fours(user_id_to_embedding: dict):
 #         print(f"Paired {u1} with {u2}")
 
 if __name__ == "__main__":
-    user_id_to_embedding = load_user_embeddings()
-    print(f"Loaded {len(user_id_to_embedding)} user embeddings.")
-    groups_of_4 = group_users_in_fours(user_id_to_embedding)
-    for idx, group in enumerate(groups_of_4, start=1):
+    parser = argparse.ArgumentParser(description="Group users by interest similarity.")
+    parser.add_argument("--persist_dir", default="User_Embeddings")
+    parser.add_argument("--collection_name", default="interests")
+    parser.add_argument("--group_size", type=int, default=4)
+    parser.add_argument("--page_size", type=int, default=5000)
+    parser.add_argument("--out", default=None, help="Export the matrix to this .npy file.")
+    args = parser.parse_args()
+
+    user_ids, matrix, _ = export_user_embeddings(
+        args.persist_dir, args.collection_name, page_size=args.page_size, out_path=args.out
+    )
+    print(f"Loaded {len(user_ids)} user embeddings.")
+    groups = group_user_matrix(user_ids, matrix, group_size=args.group_size)
+    for idx, group in enumerate(groups, start=1):
         print(f"Group {idx}:", group)
@@ -1,20 +1,151 @@
+import sys
 import os
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
 import json
 import argparse
-import torch
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
+from collections import Counter
 from langchain_community.vectorstores import Chroma
+from RAG.embedding_registry import DEFAULT_MODEL, default_device, get_embeddings
+from RAG.chunk_store import ChunkStore, ChunkStoreWriter, chunk_id, content_hash, replace_store
+from RAG.book_shards import iter_books
+from RAG.ingest_pipeline import IngestPipeline
+from RAG.chunking import create_chunker
+from RAG.lexical_index import LexicalIndex, build_lexical_index
+from RAG.dense_index import DenseIndex, export_from_chroma
+
+INGEST_MANIFEST_FILE = "ingest_manifest.json"
+
+
+def load_documents(path: str):
+    """
+    Yield (doc_name, records) from either the JSON written by extract_text.py
+    or a shard directory written by `extract_text.py --shards`. Shard records
+    are pages or chapters with their location; a JSON book is one record.
+    Shards are read one book at a time.
+    """
+    if os.path.isdir(path):
+        yield from iter_books(path)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for doc_name, doc_text in data.items():
+        yield doc_name, [{"text": doc_text or ""}]
+
+
+def load_ingest_manifest(persist_dir: str) -> dict:
+    path = os.path.join(persist_dir, INGEST_MANIFEST_FILE)
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_ingest_manifest(persist_dir: str, manifest: dict) -> None:
+    path = os.path.join(persist_dir, INGEST_MANIFEST_FILE)
+    os.makedirs(persist_dir, exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def chunk_sources(manifest: dict, chunk_ids) -> dict:
+    """ "; "-joined names of the books containing each chunk, in manifest order."""
+    books = {i: [] for i in chunk_ids}
+    for doc_name, entry in manifest.items():
+        for i in entry["chunks"]:
+            if i in books:
+                books[i].append(doc_name)
+    return {i: "; ".join(names) for i, names in books.items() if names}
+
+
+def update_chunk_sources(vectordb, manifest: dict, chunk_ids, new_chunks: dict) -> dict:
+    """
+    Set the "source" metadata of each chunk in `chunk_ids` to every book that
+    contains it, so a chunk shared by several books cites all of them.
+    Returns {id: metadata} of the chunks whose metadata changed.
+    """
+    sources = chunk_sources(manifest, chunk_ids)
+    metadatas = {i: new_chunks[i][1] for i in sources if i in new_chunks}
+    missing = [i for i in sources if i not in metadatas]
+    if missing:
+        found = vectordb.get(ids=missing, include=["metadatas"])
+        metadatas.update(zip(found["ids"], found["metadatas"]))
+    changed = {
+        i: {**(metadata or {}), "source": sources[i]}
+        for i, metadata in metadatas.items()
+        if (metadata or {}).get("source") != sources[i]
+    }
+    if changed:
+        vectordb._collection.update(ids=list(changed), metadatas=list(changed.values()))
+    return changed
+
+
+def write_chunk_store(
+    vectordb, manifest: dict, new_chunks: dict, chunk_store_dir: str, metadatas: dict = None
+):
+    """
+    Rewrite the chunk store so it holds every chunk in the manifest exactly
+    once. Texts come from this run's new chunks, then the previous store, and
+    only chunks found in neither are read back from Chroma. `metadatas`
+    replaces the metadata of the chunks it lists.
+    """
+    metadatas = metadatas or {}
+    old_store = ChunkStore(chunk_store_dir) if ChunkStore.exists(chunk_store_dir) else None
+    ids = list(dict.fromkeys(i for entry in manifest.values() for i in entry["chunks"]))
+
+    missing = [
+        i for i in ids
+        if i not in new_chunks and (old_store is None or old_store.row_of(i) is None)
+    ]
+    if missing:
+        found = vectordb.get(ids=missing, include=["documents", "metadatas"])
+        for i, text, metadata in zip(found["ids"], found["documents"], found["metadatas"]):
+            new_chunks[i] = (text, metadata)
+
+    tmp_dir = f"{chunk_store_dir}.tmp"
+    with ChunkStoreWriter(tmp_dir) as store:
+        for i in ids:
+            if i in new_chunks:
+                text, metadata = new_chunks[i]
+            elif old_store is not None and old_store.row_of(i) is not None:
+                row = old_store.row_of(i)
+                text, metadata = old_store.text(row), old_store.metadatas[row]
+            else:
+                continue
+            store.add(i, text, metadatas.get(i, metadata))
+    replace_store(tmp_dir, chunk_store_dir)
 
 
 def ingest_text_to_chroma(
-    json_file: str, persist_dir: str, collection_name: str = "rag_docs"
+    json_file: str,
+    persist_dir: str,
+    collection_name: str = "rag_docs",
+    chunk_store_dir: str = None,
+    prune: bool = False,
+    batch_size: int = 64,
+    chunker: str = "token",
+    max_tokens: int = 256,
+    overlap_tokens: int = 0,
+    workers: int = 1,
+    index_dir: str = "books_index",
 ):
     """
     Reads text from a JSON file and stores chunked embeddings in a Chroma vector store.
 
+    Ingestion is incremental and content-addressed. Books whose text hash is
+    unchanged since the last run are skipped. Chunk ids are hashes of the
+    chunk text, so a chunk already in the collection (from an earlier run or
+    another copy of the same book) is never embedded again; its "source"
+    metadata lists every book that contains it. Chunks that no book
+    references any more are deleted.
+
     Args:
-        json_file (str): Path to the JSON file containing extracted text.
+        json_file (str): Path to the JSON file containing extracted text, or
+            a shard directory from `extract_text.py --shards`.
             The file should have the structure:
             {
                 "filename1.pdf": "Some text ...",
@@ -23,22 +154,32 @@ def ingest_text_to_chroma(
             }
         persist_dir (str): Directory where Chroma data will be persisted.
         collection_name (str): Name of the Chroma collection.
+        chunk_store_dir (str): Directory for the memory-mapped chunk store the
+            retriever resolves hits from. Defaults to '<persist_dir>_chunks'.
+        prune (bool): Also delete books that are in the collection but not in
+            `json_file`, and any vectors no book references.
+        batch_size (int): Chunks per embedding batch. Splitting, embedding
+            and writes to Chroma overlap (see RAG/ingest_pipeline.py).
+        chunker (str): "token" (RAG/chunking.py) or "character" (the old
+            CharacterTextSplitter settings).
+        max_tokens (int): Token chunker window, at most 382.
+        overlap_tokens (int): Token chunker overlap between chunks.
+        workers (int): Embedding processes, each with its own copy of the
+            model (SentenceTransformer multi-process pool). 1 embeds in this
+            process.
+        index_dir (str): Dense index exported by RAG/dense_index.py. If it
+            exists it is re-exported whenever the collection changed, so
+            retrieval never serves old vectors or chunk text.
     """
 
-    # 1. Read data from JSON
-    with open(json_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    # 1. Read data from JSON (or shards, lazily)
+    data = load_documents(json_file)
 
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    print(f"[INFO] Torch device set to: {device}")
+    print(f"[INFO] Torch device set to: {default_device()}")
 
-    # 2. Initialize embeddings (HuggingFace in this example)
-    #    You can replace with OpenAIEmbeddings if you prefer.
-    embedding_model = "sentence-transformers/all-mpnet-base-v2"
-    print(f"[INFO] Using HuggingFace Embeddings: {embedding_model}")
-    embeddings = HuggingFaceEmbeddings(
-        model_name=embedding_model, model_kwargs={"device": device}
-    )
+    # 2. Initialize embeddings (shared HuggingFace model from the registry)
+    print(f"[INFO] Using HuggingFace Embeddings: {DEFAULT_MODEL}")
+    embeddings = get_embeddings()
 
     # 3. Create or load an existing Chroma DB
     #    `persist_directory` allows us to save the index to disk.
@@ -50,39 +191,172 @@ def ingest_text_to_chroma(
         embedding_function=embeddings,
         persist_directory=persist_dir,
     )
+    manifest = load_ingest_manifest(persist_dir)
+    if not manifest and vectordb._collection.count():
+        print(
+            "[WARNING] Collection has vectors but no ingest manifest; vectors from "
+            "older runs will not be deduplicated. Use a fresh --persist_dir to rebuild."
+        )
+    refs = Counter(i for entry in manifest.values() for i in set(entry["chunks"]))
 
-    # 4. Create a text splitter to chunk large texts
-    #    Adjust chunk_size/chunk_overlap as needed for your use case.
-    text_splitter = CharacterTextSplitter(
-        chunk_size=1000, chunk_overlap=200, separator="\n"
-    )
+    # 4. Create the chunker. Token chunks fit the embedding model's window
+    #    and keep page/chapter metadata; its settings are part of each book's
+    #    hash, so changing them re-chunks every book.
+    if chunker == "character":
+        text_splitter = create_chunker("character")
+    else:
+        text_splitter = create_chunker(max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+    print(f"[INFO] Chunker: {text_splitter.signature}")
 
-    # 5. Ingest each document from JSON
-    for doc_name, doc_text in data.items():
-        if not doc_text:
+    # 5. Ingest each changed document. Only chunks that are not already in
+    #    the collection are embedded; chunks the book no longer contains are
+    #    deleted once no other book references them.
+    stats = Counter()
+    new_chunks = {}  # chunks embedded in this run
+    touched = set()  # chunks whose set of referencing books changed
+    seen = set()
+    pipeline = IngestPipeline(vectordb, embeddings, batch_size=batch_size, workers=workers)
+
+    # The manifest on disk only ever lists books whose chunks are all
+    # written: the writer thread saves `committed` after each book's last
+    # chunk, so an interrupted run keeps every book finished before it.
+    committed = dict(manifest)
+
+    def commit(doc_name, entry):
+        def on_written():
+            committed[doc_name] = entry
+            save_ingest_manifest(persist_dir, committed)
+
+        return on_written
+
+    # Unreferenced chunks are deleted at the end of the run, so a chunk a
+    # later book still needs is never deleted from under it.
+    dropped = set()
+
+    def release(chunk_ids):
+        for i in chunk_ids:
+            refs[i] -= 1
+            if refs[i] <= 0:
+                del refs[i]
+                dropped.add(i)
+
+    for doc_name, records in data:
+        seen.add(doc_name)
+        doc_text = "\n".join(record.get("text") or "" for record in records)
+        if not doc_text.strip():
             print(f"[WARNING] '{doc_name}' is empty. Skipping.")
+            entry = manifest.pop(doc_name, None)
+            if entry:
+                # It had chunks before: they are no longer this book's.
+                release(set(entry["chunks"]))
+                touched.update(entry["chunks"])
             continue
 
-        # Split into chunks
-        chunks = text_splitter.split_text(doc_text)
+        book_hash = content_hash(f"{text_splitter.signature}\n{doc_text}")
+        entry = manifest.get(doc_name)
+        if entry and entry["hash"] == book_hash:
+            stats["books_unchanged"] += 1
+            stats["chunks_reused"] += len(entry["chunks"])
+            continue
+
+        # Split into chunks, each with its source and page/chapter
+        chunks = [
+            (text, {"source": doc_name, **metadata})
+            for text, metadata in text_splitter.split_records(records)
+        ]
+        ids = [chunk_id(text) for text, _ in chunks]
         print(f"[INFO] '{doc_name}' => {len(chunks)} chunks generated.")
 
-        # Prepare metadata for each chunk
-        metadatas = [{"source": doc_name} for _ in range(len(chunks))]
+        # Keep only chunks no run has stored yet
+        to_add = {}
+        for i, chunk in zip(ids, chunks):
+            if refs[i] > 0 or i in to_add:
+                stats["chunks_reused"] += 1
+            else:
+                to_add[i] = chunk
+        if to_add:
+            present = set(vectordb.get(ids=list(to_add), include=[])["ids"])
+            stats["chunks_reused"] += len(present)
+            to_add = {i: chunk for i, chunk in to_add.items() if i not in present}
+
+        new_chunks.update(to_add)
 
-        # Add chunks to Chroma
-        vectordb.add_texts(chunks, metadatas=metadatas)
+        old_ids = set(entry["chunks"]) if entry else set()
+        for i in set(ids) - old_ids:
+            refs[i] += 1
+        release(old_ids - set(ids))
+        touched.update(set(ids) ^ old_ids)
+        manifest[doc_name] = {"hash": book_hash, "chunks": list(dict.fromkeys(ids))}
+        stats["books_ingested"] += 1
 
-    # 6. Persist the database so it can be reused
+        # Queue chunks for embedding and writing while the next book is split;
+        # the book is committed to the manifest once they are written.
+        texts, metadatas = zip(*to_add.values()) if to_add else ((), ())
+        pipeline.submit(
+            list(to_add), list(texts), list(metadatas),
+            on_written=commit(doc_name, manifest[doc_name]),
+        )
+        stats["chunks_embedded"] += len(to_add)
+
+    # Chunks an interrupted run did write are found in the collection on the
+    # next run and not embedded again.
+    throughput = pipeline.close()
+    if prune:
+        for doc_name in [name for name in manifest if name not in seen]:
+            chunks = manifest.pop(doc_name)["chunks"]
+            release(set(chunks))
+            touched.update(chunks)
+            stats["books_pruned"] += 1
+        # Also sweep vectors no book references, e.g. left by an interrupted run.
+        dropped.update(vectordb.get(include=[])["ids"])
+    dropped = [i for i in dropped if refs[i] <= 0]
+    if dropped:
+        vectordb.delete(ids=dropped)
+        stats["chunks_deleted"] += len(dropped)
+    sources_changed = update_chunk_sources(
+        vectordb, manifest, touched - set(dropped), new_chunks
+    )
+    save_ingest_manifest(persist_dir, manifest)
+
+    # 6. Persist the database and the chunk store so they can be reused
     vectordb.persist()
+    chunk_store_dir = chunk_store_dir or f"{persist_dir}_chunks"
+    if (
+        stats["chunks_embedded"]
+        or stats["chunks_deleted"]
+        or sources_changed
+        or not ChunkStore.exists(chunk_store_dir)
+    ):
+        write_chunk_store(vectordb, manifest, new_chunks, chunk_store_dir, sources_changed)
+        print(f"[INFO] Chunk store written to '{chunk_store_dir}'.")
+        build_lexical_index(chunk_store_dir)
+    elif not LexicalIndex.exists(chunk_store_dir):
+        build_lexical_index(chunk_store_dir)
+    if DenseIndex.exists(index_dir) and (
+        stats["chunks_embedded"] or stats["chunks_deleted"] or sources_changed
+    ):
+        export_from_chroma(persist_dir, collection_name, index_dir)
     print(f"[INFO] Ingestion complete. Data persisted to '{persist_dir}'.")
+    print(
+        f"[INFO] Books: {stats['books_ingested']} ingested, "
+        f"{stats['books_unchanged']} unchanged, {stats['books_pruned']} pruned. "
+        f"Chunks: {stats['chunks_embedded']} embedded, {stats['chunks_deleted']} deleted, "
+        f"{stats['chunks_reused']} embeddings saved by reuse."
+    )
+    print(
+        f"[INFO] Embedded and wrote {throughput['chunks']} chunks in "
+        f"{throughput['seconds']:.1f}s ({throughput['chunks_per_sec']:.1f} chunks/sec)."
+    )
+    return {**stats, **throughput}
 
 
 def main():
     parser = argparse.ArgumentParser(
         description="Ingest text from a JSON file into a Chroma vector store."
     )
-    parser.add_argument("json_file", help="Path to the JSON file with extracted text.")
+    parser.add_argument(
+        "json_file", help="Path to the JSON file or shard directory with extracted text."
+    )
     parser.add_argument(
         "--persist_dir",
         default="chroma_db",
@@ -93,9 +367,55 @@ def main():
         default="rag_docs",
         help="Name of the Chroma collection. Defaults to 'rag_docs'.",
     )
+    parser.add_argument(
+        "--chunk_store_dir",
+        default=None,
+        help="Directory for the memory-mapped chunk store. Defaults to '<persist_dir>_chunks'.",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Delete books that are in the collection but not in the input, "
+        "and vectors no book references.",
+    )
+    parser.add_argument(
+        "--batch_size", type=int, default=64, help="Chunks per embedding batch. Defaults to 64."
+    )
+    parser.add_argument(
+        "--chunker",
+        choices=["token", "character"],
+        default="token",
+        help="Token-aware chunker (default) or the old character splitter.",
+    )
+    parser.add_argument(
+        "--max_tokens", type=int, default=256, help="Tokens per chunk. Defaults to 256."
+    )
+    parser.add_argument(
+        "--overlap_tokens", type=int, default=0, help="Token overlap. Defaults to 0."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Embedding processes. Defaults to 1."
+    )
+    parser.add_argument(
+        "--index_dir",
+        default="books_index",
+        help="Dense index to re-export when the collection changes. Defaults to 'books_index'.",
+    )
     args = parser.parse_args()
 
-    ingest_text_to_chroma(args.json_file, args.persist_dir, args.collection_name)
+    ingest_text_to_chroma(
+        args.json_file,
+        args.persist_dir,
+        args.collection_name,
+        args.chunk_store_dir,
+        args.prune,
+        args.batch_size,
+        args.chunker,
+        args.max_tokens,
+        args.overlap_tokens,
+        args.workers,
+        args.index_dir,
+    )
 
 
 if __name__ == "__main__":
@@ -1,14 +1,22 @@
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-import torch
+import sys
 import os
 
-# 1) Set up your embedding model
-embedding_model = "sentence-transformers/all-mpnet-base-v2"
-embeddings = HuggingFaceEmbeddings(
-    model_name=embedding_model,
-    model_kwargs={"device": "cuda" if torch.cuda.is_available() else "cpu"},
-)
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import asyncio
+import numpy as np
+from langchain_chroma import Chroma
+from RAG.embedding_service import get_embedding_service
+from RAG.dense_index import DenseIndex, normalize_rows
+from RAG.chunk_store import ChunkStore
+from RAG.lexical_index import LexicalIndex
+from RAG.hybrid_search import CrossEncoderReranker, HybridRetriever
+
+# 1) Set up your embedding model (shared, loaded on the first query). Query
+#    vectors are cached and concurrent queries are embedded in batches.
+embeddings = get_embedding_service()
 
 # 2) Load the existing Chroma DB from the local folder
 #    Make sure 'persist_directory' matches wherever you originally saved your Chroma DB
@@ -20,16 +28,100 @@ vectordb = Chroma(
 
 # 3) Create a retriever
 retriever = vectordb.as_retriever(search_kwargs={"k": 2})
+top_k = 2
+
+
+class ChromaChunkSearch:
+    """
+    Chroma returns only the ids of the nearest chunks; their texts and
+    metadata are sliced from the memory-mapped chunk store written at ingest.
+    Falls back to a full Chroma search if the store is missing any hit.
+    """
+
+    def __init__(self, vectordb, store: ChunkStore):
+        self.vectordb = vectordb
+        self.store = store
+
+    def similarity_search_by_vector(self, embedding, k: int = 2):
+        result = self.vectordb._collection.query(
+            query_embeddings=[embedding], n_results=k, include=[]
+        )
+        ids = result["ids"][0]
+        docs = self.store.documents_by_id(ids)
+        if len(docs) < len(ids):
+            return self.vectordb.similarity_search_by_vector(embedding, k=k)
+        return docs
+
+    def vectors_for_ids(self, chunk_ids) -> dict:
+        """Normalised stored vectors of the given chunks, by id."""
+        found = self.vectordb._collection.get(ids=list(chunk_ids), include=["embeddings"])
+        vectors = np.asarray(found["embeddings"], dtype=np.float32).reshape(len(found["ids"]), -1)
+        return dict(zip(found["ids"], normalize_rows(vectors)))
+
+
+# 4) Read-optimised search backend. "auto" uses the memory-mapped dense index
+#    exported by RAG/dense_index.py when it exists, then Chroma with hits
+#    resolved from the chunk store built by RAG/process_into_rag.py, and
+#    plain Chroma otherwise.
+rag_backend = os.getenv("RAG_BACKEND", "auto").lower()
+index_dir = os.getenv("RAG_INDEX_DIR", "books_index")
+chunk_store_dir = os.getenv("RAG_CHUNK_STORE_DIR", "books_chroma_db_chunks")
+if rag_backend == "dense" or (rag_backend == "auto" and DenseIndex.exists(index_dir)):
+    search_backend = DenseIndex(index_dir)
+    print(f"[INFO] Using dense index at '{index_dir}' for retrieval.")
+elif rag_backend != "chroma" and ChunkStore.exists(chunk_store_dir):
+    search_backend = ChromaChunkSearch(vectordb, ChunkStore(chunk_store_dir))
+    print(f"[INFO] Resolving retrieved chunks from '{chunk_store_dir}'.")
+else:
+    search_backend = vectordb
+
+# 5) Optional hybrid retrieval (RAG_RETRIEVAL=hybrid): BM25 over the chunk
+#    store plus the vector search, fused by reciprocal rank, with a cosine
+#    relevance floor and an optional cross-encoder rerank under a latency
+#    budget. Weak hits are dropped, so fewer than top_k chunks may come back.
+hybrid = None
+if os.getenv("RAG_RETRIEVAL", "dense").lower() == "hybrid":
+    lexical_dir = index_dir if isinstance(search_backend, DenseIndex) else chunk_store_dir
+    if search_backend is vectordb or not LexicalIndex.exists(lexical_dir):
+        print(f"[WARNING] No lexical index in '{lexical_dir}'; using dense retrieval.")
+    else:
+        rerank_model = os.getenv("RAG_RERANK_MODEL", "")
+        hybrid = HybridRetriever(
+            search_backend,
+            lexical_dir,
+            candidates=int(os.getenv("RAG_CANDIDATES", "20")),
+            min_similarity=float(os.getenv("RAG_MIN_SIMILARITY", "0.25")),
+            reranker=CrossEncoderReranker(
+                rerank_model, budget_ms=float(os.getenv("RAG_RERANK_BUDGET_MS", "150"))
+            )
+            if rerank_model
+            else None,
+            min_rerank_score=float(os.getenv("RAG_RERANK_MIN_SCORE", "0")),
+        )
+        print(f"[INFO] Using hybrid retrieval over '{lexical_dir}'.")
 
 
 def query_retriever(query: str):
     """
     Given a query, retrieve relevant documents from the vector store.
     """
-    # If you’re using the standard LangChain retriever,
-    # use 'retriever.get_relevant_documents(query)'
-    relevant_docs = retriever.invoke(query)
-    return relevant_docs
+    vector = embeddings.embed_query(query)
+    if hybrid is not None:
+        return hybrid.search(query, vector, k=top_k)
+    return search_backend.similarity_search_by_vector(vector, k=top_k)
+
+
+async def aquery_retriever(query: str):
+    """
+    Async variant for the chat path: the embedding is awaited on the batching
+    service and only the vector search runs in a worker thread.
+    """
+    vector = await embeddings.aembed_query(query)
+    if hybrid is not None:
+        return await asyncio.to_thread(hybrid.search, query, vector, k=top_k)
+    return await asyncio.to_thread(
+        search_backend.similarity_search_by_vector, vector, k=top_k
+    )
 
 
 # Example usage
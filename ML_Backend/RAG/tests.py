@@ -0,0 +1,55 @@
+import sys
+import os
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from RAG import chunking
+from RAG.chunking import TokenChunker
+
+
+class WordTokenizer:
+    """One token per word, standing in for the model's tokenizer."""
+
+    def __call__(self, texts, add_special_tokens=False, return_offsets_mapping=False):
+        if isinstance(texts, str):
+            offsets, start = [], 0
+            for word in texts.split():
+                start = texts.index(word, start)
+                offsets.append((start, start + len(word)))
+                start += len(word)
+            return {"offset_mapping": offsets}
+        return {"input_ids": [text.split() for text in texts]}
+
+
+def paragraph(name, tokens):
+    return " ".join(f"{name}{i}" for i in range(tokens))
+
+
+def test_overlap_never_exceeds_max_tokens():
+    print("\n===== Testing Chunk Overlap =====")
+    chunking._tokenizers["words"] = WordTokenizer()
+    chunker = TokenChunker(max_tokens=100, min_tokens=0, overlap_tokens=40, model_name="words")
+    text = "\n\n".join(
+        paragraph(name, tokens) for name, tokens in [("a", 30), ("b", 30), ("c", 90), ("d", 30)]
+    )
+    chunks = list(chunker.split_records([{"text": text, "page": 1}]))
+    sizes = [len(chunk.split()) for chunk, _ in chunks]
+    print("Chunk sizes:", sizes)
+    assert all(size <= 100 for size in sizes), sizes
+    assert sizes == [60, 90, 30], sizes
+
+    # The overlap is kept when it fits next to the new paragraph.
+    text = "\n\n".join(paragraph(name, 30) for name in "abcd")
+    sizes = [len(chunk.split()) for chunk, _ in chunker.split_records([{"text": text}])]
+    print("Chunk sizes:", sizes)
+    assert sizes == [90, 60], sizes
+
+
+def run_tests():
+    test_overlap_never_exceeds_max_tokens()
+
+
+if __name__ == "__main__":
+    run_tests()
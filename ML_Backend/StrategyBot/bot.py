@@ -7,10 +7,14 @@ sys.path.insert(0, BASE_DIR)
 
 import google.generativeai as genai
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from StrategyBot.utils import format_conversation, format_messages
+import datetime
+import logging
+from StrategyBot.utils import format_conversation, format_messages, parse_conversation
+from result_cache import content_hash, create_result_cache
 import re
 
+logger = logging.getLogger(__name__)
+
 api_key = os.getenv("GOOGLE_API_KEY1")
 genai.configure(api_key=api_key)
 # print("API Key set")
@@ -23,11 +27,15 @@ generation_config = {
     "response_mime_type": "text/plain",
 }
 
-model = genai.GenerativeModel(
-    model_name="gemini-1.5-flash-8b",
-    generation_config=generation_config,
-)
-# print("model set")
+model_name = "gemini-1.5-flash-8b"
+# Explicit context caching needs a pinned model version.
+cached_model_name = "models/gemini-1.5-flash-8b-001"
+use_context_cache = os.getenv("STRATEGY_CONTEXT_CACHE", "0") == "1"
+cache_ttl = datetime.timedelta(minutes=int(os.getenv("STRATEGY_CACHE_TTL_MINUTES", 60)))
+
+# "llm" (default) calls Gemini, "local" uses the classifier trained by
+# StrategyBot/local_classifier.py.
+strategy_mode = os.getenv("STRATEGY_MODE", "llm").lower()
 system_prompt = """Your task is to analyze a conversation and predict the therapy strategy to be respond to the newest user message. Before giving your final answer, explain your reasoning step-by-step, showing how earlier parts of the conversation led to your prediction. The possible strategies are: Question, Restatement or Paraphrasing, Reflection of feelings, Self-disclosure, Affirmation and Reassurance, Providing Suggestions, Information, and Others. Finally, output the final predicted strategies as a comma-separated list. Try not to use too many strategies at once.
 
 Examples:
@@ -123,26 +131,99 @@ Final Answer: Information, Reflection of feelings
 Based on the above, predict the strategies for the following conversation.
 
 Input:\n"""
-chat_session = model.start_chat(
-    history=[
-        {
-            "role": "user",
-            "parts": [system_prompt],
-        },
-    ]
+
+_model = None
+_model_expires_at = None
+
+
+def get_model():
+    """
+    Returns a stateless model whose few-shot system prompt is sent as a fixed
+    prefix (system instruction), so every prediction only carries the current
+    conversation window.
+
+    With STRATEGY_CONTEXT_CACHE=1 the system prompt is uploaded once as cached
+    content and reused until it expires. The API only caches prompts above a
+    minimum size, so if creating the cache fails we fall back to the plain
+    system instruction.
+    """
+    global _model, _model_expires_at
+    now = datetime.datetime.now(datetime.timezone.utc)
+    if _model is not None and (_model_expires_at is None or now < _model_expires_at):
+        return _model
+
+    if use_context_cache:
+        try:
+            cached = genai.caching.CachedContent.create(
+                model=cached_model_name,
+                display_name="strategy-system-prompt",
+                system_instruction=system_prompt,
+                ttl=cache_ttl,
+            )
+            _model = genai.GenerativeModel.from_cached_content(
+                cached_content=cached, generation_config=generation_config
+            )
+            # Refresh a little before the server drops the cache.
+            _model_expires_at = now + cache_ttl - datetime.timedelta(minutes=1)
+            return _model
+        except Exception as e:
+            logger.warning(f"Context cache unavailable, using system instruction: {e}")
+
+    _model = genai.GenerativeModel(
+        model_name=model_name,
+        generation_config=generation_config,
+        system_instruction=system_prompt,
+    )
+    _model_expires_at = None
+    return _model
+
+
+# Keyed on a hash of the formatted conversation window.
+strategy_cache = create_result_cache("strategy")
+
+_local_classifier = None
+
+
+def get_local_classifier():
+    global _local_classifier
+    if _local_classifier is None:
+        from StrategyBot.local_classifier import LocalStrategyClassifier, DEFAULT_ARTIFACT
+
+        _local_classifier = LocalStrategyClassifier(
+            os.getenv("STRATEGY_CLASSIFIER_PATH", DEFAULT_ARTIFACT)
+        )
+    return _local_classifier
+
+
+strategy_pattern = re.compile(
+    r"(?s)Reasoning:\s*(?P<reasoning>.*?)\s*Final Answer:\s*(?P<strategy>.+)$"
 )
 
 
-async def predict_therapy_strategy(history: list):
+def parse_strategy_response(text: str):
+    """Split a model response into (reasoning, strategy_list)."""
+    match = strategy_pattern.search(text)
+    reasoning = ""
+    strategy_list = []
+    if match:
+        reasoning = match.group("reasoning").strip()
+        # Split the strategy string by comma and strip each element
+        strategy_list = [s.strip() for s in match.group("strategy").split(",")]
+    return (reasoning, strategy_list)
+
+
+async def predict_therapy_strategy(history: list, mode: str = None):
     """
-    Predicts therapy strategies based on conversation history using Gemini API.
+    Predicts therapy strategies based on conversation history using Gemini API,
+    or the local classifier when STRATEGY_MODE (or `mode`) is "local".
 
     Args:
-        user_message (str): The latest message in the conversation to analyze
-        api_key (str): Gemini API key
+        history (list): The current conversation window, either message dicts
+            or LangChain messages, ending with the newest user message
+        mode (str): Overrides STRATEGY_MODE ("llm" or "local")
 
     Returns:
-        str: The API response containing predicted therapy strategies
+        tuple: (reasoning, strategy_list) parsed from the model response
     """
     try:
         conversation = ""
@@ -150,28 +231,28 @@ async def predict_therapy_strategy(history: list):
             conversation = format_messages(history)
         else:
             conversation = format_conversation(history)
-        # Since send_message is not actually async, we'll run it in a thread pool
-        # print(conversation)
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as pool:
-            response = await loop.run_in_executor(
-                pool, chat_session.send_message, conversation
-            )
-            # print(response)
-        pattern = re.compile(
-            r"(?s)Reasoning:\s*(?P<reasoning>.*?)\s*Final Answer:\s*(?P<strategy>.+)$"
-        )
 
-        match = pattern.search(response.text)
-        # print(match)
-        reasoning = ""
-        strategy_list = []
-        if match:
-            reasoning = match.group("reasoning").strip()
-            # Split the strategy string by comma and strip each element
-            strategy_list = [s.strip() for s in match.group("strategy").split(",")]
-            # print(reasoning, strategy_list)
-        return (reasoning, strategy_list)
+        mode = mode or strategy_mode
+        cache_key = content_hash(f"{mode}\n{conversation}")
+        cached = await strategy_cache.aget(cache_key)
+        if cached is not None:
+            return tuple(cached)
+
+        if mode == "local":
+            messages = history
+            if not isinstance(history[0], dict):
+                messages = parse_conversation(conversation)
+            result = get_local_classifier().predict(messages)
+        else:
+            # Stateless call: system prompt + the current window only, so nothing
+            # accumulates between predictions or leaks across users.
+            response = await get_model().generate_content_async(conversation)
+            result = parse_strategy_response(response.text)
+
+        # An unparseable response is not cached, so the next call retries.
+        if result[1]:
+            await strategy_cache.aset(cache_key, list(result))
+        return result
 
     except KeyError as e:
         raise ValueError(f"Missing required API key: {str(e)}")
@@ -0,0 +1,93 @@
+import sys
+import os
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import csv
+import ast
+import time
+import asyncio
+import argparse
+from StrategyBot.utils import parse_conversation
+from StrategyBot.local_classifier import STRATEGY_DIR
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def score(predictions, labels):
+    """Exact-set accuracy, any-match accuracy (some predicted label is gold) and micro F1."""
+    exact = any_match = tp = fp = fn = 0
+    for pred, gold in zip(predictions, labels):
+        pred, gold = set(pred), set(gold)
+        exact += pred == gold
+        any_match += bool(pred & gold)
+        tp += len(pred & gold)
+        fp += len(pred - gold)
+        fn += len(gold - pred)
+    n = len(labels)
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"exact": exact / n, "any_match": any_match / n, "micro_f1": f1}
+
+
+async def evaluate(mode, rows):
+    from StrategyBot.bot import predict_therapy_strategy
+
+    predictions, labels, latencies = [], [], []
+    for messages, gold in rows:
+        start = time.perf_counter()
+        try:
+            _, strategy_list = await predict_therapy_strategy(messages, mode=mode)
+        except Exception as e:
+            print(f"[WARNING] {mode} prediction failed: {e}")
+            strategy_list = []
+        latencies.append(time.perf_counter() - start)
+        predictions.append(strategy_list)
+        labels.append(gold)
+    metrics = score(predictions, labels)
+    metrics["p50_ms"] = percentile(latencies, 50) * 1000
+    metrics["p99_ms"] = percentile(latencies, 99) * 1000
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the local strategy classifier with the LLM path on test.csv."
+    )
+    parser.add_argument("--test", default=os.path.join(STRATEGY_DIR, "test.csv"))
+    parser.add_argument(
+        "--modes", nargs="+", default=["local", "llm"], choices=["local", "llm"]
+    )
+    parser.add_argument(
+        "--limit", type=int, default=200, help="Rows to evaluate (the LLM path is slow)."
+    )
+    args = parser.parse_args()
+
+    rows = []
+    with open(args.test, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            messages = parse_conversation(row["text"])
+            # predict_therapy_strategy needs a non-empty window.
+            if messages:
+                rows.append((messages, ast.literal_eval(row["label"])))
+            if len(rows) >= args.limit:
+                break
+
+    print(f"[INFO] Evaluating {len(rows)} rows from '{args.test}'.")
+    print(f"{'mode':>6} {'exact':>7} {'any':>7} {'F1':>7} {'p50':>10} {'p99':>10}")
+    for mode in args.modes:
+        m = asyncio.run(evaluate(mode, rows))
+        print(
+            f"{mode:>6} {m['exact']:>7.3f} {m['any_match']:>7.3f} {m['micro_f1']:>7.3f} "
+            f"{m['p50_ms']:>8.1f}ms {m['p99_ms']:>8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import sys
+import os
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import ast
+import csv
+import time
+import argparse
+from StrategyBot.utils import parse_conversation
+
+STRATEGY_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ARTIFACT = os.path.join(STRATEGY_DIR, "strategy_classifier.joblib")
+
+strategy_labels = [
+    "Question",
+    "Restatement or Paraphrasing",
+    "Reflection of feelings",
+    "Self-disclosure",
+    "Affirmation and Reassurance",
+    "Providing Suggestions",
+    "Information",
+    "Others",
+]
+
+# Like the notebook models, only the most recent utterances are used.
+MAX_UTTERANCES = 6
+
+
+def window_text(messages) -> str:
+    """
+    Flatten the last utterances of a conversation (message dicts) into the
+    text the classifier sees. Sys strategies are kept as tokens because the
+    previous strategy is a strong signal for the next one.
+    """
+    parts = []
+    for msg in messages[-MAX_UTTERANCES:]:
+        if msg["role"] == "sys":
+            strategy = " ".join(
+                "STRATEGY_" + s.replace(" ", "_") for s in msg.get("strategy") or []
+            )
+            parts.append(f"sys {strategy} {msg['content']}")
+        else:
+            parts.append(f"usr {msg['content']}")
+    # The newest user message matters most, so repeat it with a marker.
+    if messages and messages[-1]["role"] == "usr":
+        parts.append("LAST_USR " + messages[-1]["content"])
+    return " ".join(parts)
+
+
+def load_csv(path):
+    """Read (text, labels) pairs from an ESConv CSV produced by strategy.ipynb."""
+    texts, labels = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            texts.append(window_text(parse_conversation(row["text"])))
+            labels.append(ast.literal_eval(row["label"]))
+    return texts, labels
+
+
+def train(train_paths, out_path=DEFAULT_ARTIFACT, threshold=0.35, max_strategies=2):
+    """
+    Fit a TF-IDF + one-vs-rest logistic regression multi-label classifier and
+    save it with joblib.
+    """
+    import joblib
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.multiclass import OneVsRestClassifier
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import MultiLabelBinarizer
+
+    texts, labels = [], []
+    for path in train_paths:
+        t, l = load_csv(path)
+        print(f"[INFO] Loaded {len(t)} examples from '{path}'.")
+        texts += t
+        labels += l
+
+    binarizer = MultiLabelBinarizer(classes=strategy_labels)
+    y = binarizer.fit_transform(labels)
+    model = make_pipeline(
+        TfidfVectorizer(ngram_range=(1, 2), min_df=2, sublinear_tf=True, max_features=100000),
+        OneVsRestClassifier(LogisticRegression(max_iter=1000, C=4.0)),
+    )
+    start = time.perf_counter()
+    model.fit(texts, y)
+    print(f"[INFO] Trained on {len(texts)} examples in {time.perf_counter() - start:.1f}s.")
+
+    joblib.dump(
+        {
+            "model": model,
+            "labels": list(binarizer.classes_),
+            "threshold": threshold,
+            "max_strategies": max_strategies,
+        },
+        out_path,
+    )
+    print(f"[INFO] Saved classifier to '{out_path}'.")
+
+
+class LocalStrategyClassifier:
+    """CPU-only strategy predictor returning the same shape as the LLM path."""
+
+    def __init__(self, path=DEFAULT_ARTIFACT):
+        import joblib
+
+        artifact = joblib.load(path)
+        self.model = artifact["model"]
+        self.labels = artifact["labels"]
+        self.threshold = artifact["threshold"]
+        self.max_strategies = artifact["max_strategies"]
+
+    def predict(self, messages):
+        """
+        Args:
+            messages (list): Conversation as message dicts (see format_conversation)
+
+        Returns:
+            tuple: (reasoning, strategy_list)
+        """
+        probs = self.model.predict_proba([window_text(messages)])[0]
+        ranked = sorted(zip(self.labels, probs), key=lambda x: x[1], reverse=True)
+        chosen = [(label, p) for label, p in ranked if p >= self.threshold]
+        # Always predict at least one strategy, and not too many at once.
+        chosen = chosen[: self.max_strategies] or ranked[:1]
+        reasoning = "Predicted by the local strategy classifier: " + ", ".join(
+            f"{label} ({p:.2f})" for label, p in chosen
+        )
+        return (reasoning, [label for label, _ in chosen])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Train the local therapy strategy classifier on the ESConv CSVs."
+    )
+    parser.add_argument(
+        "--train",
+        nargs="+",
+        default=None,
+        help="Training CSVs. Defaults to val.csv plus train.csv when present.",
+    )
+    parser.add_argument("--out", default=DEFAULT_ARTIFACT, help="Output artifact path.")
+    parser.add_argument("--threshold", type=float, default=0.35)
+    parser.add_argument("--max_strategies", type=int, default=2)
+    args = parser.parse_args()
+
+    train_paths = args.train
+    if train_paths is None:
+        # test.csv is held out for eval_strategy.py.
+        train_paths = [
+            os.path.join(STRATEGY_DIR, name)
+            for name in ("train.csv", "val.csv")
+            if os.path.isfile(os.path.join(STRATEGY_DIR, name))
+        ]
+    train(train_paths, args.out, args.threshold, args.max_strategies)
+
+
+if __name__ == "__main__":
+    main()
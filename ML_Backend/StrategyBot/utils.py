@@ -1,3 +1,4 @@
+import re
 from typing import List, Dict, Optional, Union
 from langchain_core.prompts import PromptTemplate
 from langchain.memory import ChatMessageHistory
@@ -69,6 +70,25 @@ def format_conversation(messages: List[Dict]) -> str:
     return "\n".join(formatted_messages)
 
 
+def parse_conversation(text: str) -> List[Dict]:
+    """
+    Inverse of format_conversation for the ESConv CSV rows, which hold the
+    formatted turns joined by spaces or newlines, e.g.
+    "sys(Others): Hello. usr: hi i am okay sys(Question, Self-disclosure): ..."
+    """
+    messages = []
+    if not text:
+        return messages
+    for turn in re.split(r"\s+(?=(?:usr:|sys(?:\([^)]*\))?:))", text.strip()):
+        if turn.startswith("usr:"):
+            messages.append({"role": "usr", "content": turn[4:].strip()})
+        elif turn.startswith("sys"):
+            head, content = turn.split(":", 1)
+            strategy = [x.strip() for x in head[4:-1].split(",") if x.strip()]
+            messages.append({"role": "sys", "strategy": strategy, "content": content.strip()})
+    return messages
+
+
 from langchain.schema import HumanMessage, AIMessage, SystemMessage
 import re
 
@@ -87,6 +107,10 @@ def format_messages(messages):
             strategies = extract_strategies(msg)
         elif isinstance(msg, HumanMessage):
             formatted_output.append(f"usr: {msg.content}")
+            # Structured user turns carry the strategy used for the reply that follows.
+            turn_strategy = msg.additional_kwargs.get("turn", {}).get("strategy")
+            if turn_strategy:
+                strategies = ", ".join(turn_strategy)
         elif isinstance(msg, AIMessage):
             if strategies:
                 formatted_output.append(f"sys({strategies}): {msg.content}")
@@ -1,6 +1,7 @@
 from flask import Flask, render_template, Response, request
 import json
 from chatbot_stream import Chatbot
+from EmotionBot.bot import close_http_session
 import os
 import asyncio
 import threading
@@ -111,6 +112,7 @@ if __name__ == "__main__":
         )
     finally:
         # Clean up when the application exits
+        asyncio.run_coroutine_threadsafe(close_http_session(), loop).result()
         loop.call_soon_threadsafe(loop.stop)
         thread.join()
         loop.close()
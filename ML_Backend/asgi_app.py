@@ -0,0 +1,90 @@
+"""ASGI serving mode for the chat endpoint.
+
+Drop-in alternative to app.py that keeps the same SSE wire format but drives
+`Chatbot.chat` directly from the request coroutine: no per-request thread, no
+queue handoff per token and one event loop per worker.
+
+Run with:
+    uvicorn asgi_app:app --host 0.0.0.0 --port $PORT --workers 4
+"""
+
+import os
+import json
+import logging
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from chatbot_stream import Chatbot
+
+app = FastAPI()
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Create a single instance of Chatbot
+chatbot = Chatbot()
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable nginx buffering if you're using it
+}
+
+
+def sse_event(payload: dict) -> str:
+    """Format a payload the same way app.py does."""
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+async def stream_chat(message, session_id, user_id):
+    """
+    Stream chatbot tokens as SSE events.
+
+    Tokens are pulled from `Chatbot.chat` only when the previous event has been
+    handed to the server, so a slow client slows the upstream LLM stream down
+    instead of buffering it (backpressure). If the client goes away Starlette
+    cancels the response task and the upstream generator is closed here.
+    """
+    stream = chatbot.chat(message, session_id, user_id)
+    try:
+        async for chunk in stream:
+            yield sse_event({"content": chunk})
+    except Exception as e:
+        logger.error(f"Error in chat processing: {e}", exc_info=True)
+        yield sse_event({"error": str(e)})
+    finally:
+        await stream.aclose()
+
+
+@app.get("/")
+async def home():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    file_path = os.path.join(base_dir, "templates", "index.html")
+    with open(file_path, "r", encoding="utf-8") as f:
+        return HTMLResponse(content=f.read())
+
+
+@app.post("/chat")
+async def chat(request: Request):
+    try:
+        data = await request.json()
+        message = data.get("message")
+        session_id = data.get("sessionId")
+        user_id = data.get("userId", "default-user")
+
+        if not message or not session_id:
+            return JSONResponse({"error": "Missing required fields"}, status_code=400)
+
+        return StreamingResponse(
+            stream_chat(message, session_id, user_id),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS,
+        )
+    except Exception as e:
+        logger.error(f"Error in chat endpoint: {e}", exc_info=True)
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    port = int(os.environ.get("PORT", 5000))
+    uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,84 @@
+"""
+Concurrency of the three pre-generation legs of Chatbot.chat.
+
+Times RAG retrieval, emotion detection and strategy prediction on their own,
+then the same three under asyncio.gather as Chatbot.chat runs them. When no
+leg blocks the event loop the gather finishes in about max(legs) instead of
+sum(legs). Needs the same environment as the chat server.
+
+    python benchmarks/bench_chat_gather.py --rounds 10
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from langchain_core.messages import HumanMessage
+from EmotionBot.bot import close_http_session, emotion_detection
+from StrategyBot.bot import predict_therapy_strategy
+from RAG.retreive_books import aquery_retriever
+
+QUERIES = [
+    "I am feeling very sad today. My dog passed away and I am devastated.",
+    "Work has been overwhelming and I can't sleep.",
+    "I had a fight with my best friend and I don't know how to fix it.",
+]
+
+
+def legs(query):
+    return {
+        "rag": lambda: aquery_retriever(query),
+        "emotion": lambda: emotion_detection(query),
+        "strategy": lambda: predict_therapy_strategy([HumanMessage(content=query)]),
+    }
+
+
+async def timed(coro_factory):
+    start = time.perf_counter()
+    await coro_factory()
+    return time.perf_counter() - start
+
+
+async def main_async(rounds):
+    per_leg = {name: [] for name in legs("")}
+    sums, maxes, gathered = [], [], []
+    # Warm up models and connection pools so the first round is not an outlier.
+    await asyncio.gather(*(factory() for factory in legs(QUERIES[0]).values()))
+
+    for i in range(rounds):
+        query = QUERIES[i % len(QUERIES)]
+        times = {name: await timed(factory) for name, factory in legs(query).items()}
+        for name, t in times.items():
+            per_leg[name].append(t)
+        sums.append(sum(times.values()))
+        maxes.append(max(times.values()))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(factory() for factory in legs(query).values()))
+        gathered.append(time.perf_counter() - start)
+
+    for name, times in per_leg.items():
+        print(f"{name:>10}: p50 {statistics.median(times):.3f}s")
+    print(f"{'sum(legs)':>10}: p50 {statistics.median(sums):.3f}s")
+    print(f"{'max(legs)':>10}: p50 {statistics.median(maxes):.3f}s")
+    print(f"{'gather':>10}: p50 {statistics.median(gathered):.3f}s")
+    await close_http_session()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs gathered chat legs.")
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args.rounds))
+
+
+if __name__ == "__main__":
+    main()
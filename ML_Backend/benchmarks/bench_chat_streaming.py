@@ -0,0 +1,164 @@
+"""
+Load benchmark for the streaming /chat endpoint.
+
+Compares time-to-first-token and the maximum number of concurrent streams
+between the Flask path (app.py under gunicorn/gevent) and the ASGI path
+(asgi_app.py under uvicorn). Start both servers first, e.g.
+
+    gunicorn --worker-class gevent --bind 0.0.0.0:5000 app:app
+    uvicorn asgi_app:app --host 0.0.0.0 --port 8000
+
+then run
+
+    python benchmarks/bench_chat_streaming.py \
+        --target flask=http://127.0.0.1:5000 --target asgi=http://127.0.0.1:8000
+
+Only the standard library is used so the client itself never becomes the
+bottleneck being measured.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from urllib.parse import urlparse
+
+
+async def one_stream(host, port, message, timeout):
+    """
+    Open one /chat stream and return (ok, ttft_seconds, total_seconds).
+    """
+    body = json.dumps(
+        {
+            "message": message,
+            "sessionId": str(uuid.uuid4()),
+            "userId": "bench-user",
+        }
+    ).encode("utf-8")
+    request = (
+        f"POST /chat HTTP/1.1\r\n"
+        f"Host: {host}:{port}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n"
+    ).encode("ascii") + body
+
+    start = time.perf_counter()
+    ttft = None
+    received = b""
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout
+        )
+        writer.write(request)
+        await writer.drain()
+        while True:
+            remaining = timeout - (time.perf_counter() - start)
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            data = await asyncio.wait_for(reader.read(4096), remaining)
+            if not data:
+                break
+            received += data
+            if ttft is None and b"data: " in received:
+                ttft = time.perf_counter() - start
+        writer.close()
+    except (OSError, asyncio.TimeoutError):
+        return False, ttft, time.perf_counter() - start
+
+    ok = received.startswith(b"HTTP/1.1 200") and b'"error"' not in received
+    return ok and ttft is not None, ttft, time.perf_counter() - start
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def run_level(url, concurrency, message, timeout):
+    parsed = urlparse(url)
+    host, port = parsed.hostname, parsed.port or 80
+    results = await asyncio.gather(
+        *(one_stream(host, port, message, timeout) for _ in range(concurrency))
+    )
+    ttfts = [ttft for ok, ttft, _ in results if ok]
+    totals = [total for ok, _, total in results if ok]
+    return {
+        "concurrency": concurrency,
+        "success_rate": len(ttfts) / concurrency,
+        "ttft_p50": percentile(ttfts, 50),
+        "ttft_p99": percentile(ttfts, 99),
+        "total_p50": statistics.median(totals) if totals else float("nan"),
+    }
+
+
+async def bench_target(name, url, levels, message, timeout, ttft_budget):
+    print(f"\n[INFO] Benchmarking '{name}' at {url}")
+    print(f"{'streams':>8} {'ok':>7} {'ttft p50':>10} {'ttft p99':>10} {'total p50':>10}")
+    max_streams = 0
+    for level in levels:
+        stats = await run_level(url, level, message, timeout)
+        print(
+            f"{stats['concurrency']:>8} {stats['success_rate']:>7.1%} "
+            f"{stats['ttft_p50']:>9.3f}s {stats['ttft_p99']:>9.3f}s "
+            f"{stats['total_p50']:>9.3f}s"
+        )
+        if stats["success_rate"] < 0.99 or stats["ttft_p99"] > ttft_budget:
+            break
+        max_streams = level
+    print(
+        f"[INFO] '{name}': max concurrent streams within budget "
+        f"(>=99% ok, p99 TTFT <= {ttft_budget}s): {max_streams}"
+    )
+    return max_streams
+
+
+async def main_async(args):
+    summary = {}
+    for target in args.target:
+        name, url = target.split("=", 1)
+        summary[name] = await bench_target(
+            name, url, args.levels, args.message, args.timeout, args.ttft_budget
+        )
+    print("\n[INFO] Summary (max concurrent streams):")
+    for name, max_streams in summary.items():
+        print(f"  {name}: {max_streams}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare TTFT and max concurrent streams of /chat servers."
+    )
+    parser.add_argument(
+        "--target",
+        action="append",
+        required=True,
+        help="name=url of a running server, may be given several times.",
+    )
+    parser.add_argument(
+        "--levels",
+        type=int,
+        nargs="+",
+        default=[1, 8, 32, 64, 128, 256, 512],
+        help="Concurrency levels to ramp through.",
+    )
+    parser.add_argument("--message", default="I have been feeling anxious lately.")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument(
+        "--ttft_budget",
+        type=float,
+        default=10.0,
+        help="p99 time-to-first-token (seconds) above which a level counts as failed.",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
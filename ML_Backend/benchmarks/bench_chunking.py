@@ -0,0 +1,133 @@
+"""
+Chunking settings: index size, search latency and a retrieval-quality proxy.
+
+For each configuration the sampled books are chunked, embedded and searched
+with exact in-memory cosine search. Reported per configuration:
+
+  chunks, mean tokens      how many vectors, and how full each one is
+  over_window              chunks longer than the model's 384-token window
+                           (their tail is silently dropped at embedding time)
+  stored/source            stored characters / source characters; anything
+                           above 1.0 is overlap stored and embedded twice
+  index_mb                 float32 vectors + chunk text
+  search_ms                p50 latency of one exact top-k search
+  hit@k                    share of probe queries whose source sentence is in
+                           one of the top-k chunks
+
+Probe queries are corpus sentences with every third word dropped, so a hit
+needs semantic rather than exact overlap.
+
+    python benchmarks/bench_chunking.py books_shards --max_books 3 \
+        --configs character token:128 token:256 token:256:32 token:382
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from RAG.embedding_registry import get_embeddings
+from RAG.chunking import MODEL_MAX_TOKENS, SENTENCE_RE, TokenChunker, create_chunker
+from RAG.process_into_rag import load_documents
+
+
+def parse_config(config):
+    """'character', 'token:<max_tokens>' or 'token:<max_tokens>:<overlap_tokens>'."""
+    kind, *values = config.split(":")
+    if kind == "character":
+        return create_chunker("character")
+    values = [int(v) for v in values]
+    return create_chunker(
+        max_tokens=values[0] if values else 256,
+        overlap_tokens=values[1] if len(values) > 1 else 0,
+    )
+
+
+def normalize(text):
+    return " ".join(text.split())
+
+
+def probe_queries(books, n, seed=0):
+    rng = random.Random(seed)
+    sentences = [
+        normalize(s)
+        for records in books.values()
+        for record in records
+        for s in SENTENCE_RE.split(normalize(record.get("text") or ""))
+        if 12 <= len(s.split()) <= 40
+    ]
+    probes = rng.sample(sentences, min(n, len(sentences)))
+    queries = [" ".join(w for i, w in enumerate(s.split()) if i % 3 != 2) for s in probes]
+    return probes, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare chunking settings.")
+    parser.add_argument("corpus", help="Extracted JSON file or shard directory.")
+    parser.add_argument("--max_books", type=int, default=3)
+    parser.add_argument(
+        "--configs",
+        nargs="+",
+        default=["character", "token:128", "token:256", "token:256:32", "token:382"],
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=2)
+    args = parser.parse_args()
+
+    books = {}
+    for name, records in load_documents(args.corpus):
+        books[name] = records
+        if len(books) >= args.max_books:
+            break
+    source_chars = sum(
+        len(normalize(record.get("text") or "")) for records in books.values() for record in records
+    )
+    probes, queries = probe_queries(books, args.queries)
+    embeddings = get_embeddings()
+    query_vectors = np.asarray(embeddings.embed_documents(queries), dtype=np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    counter = TokenChunker()
+    print(f"[INFO] {len(books)} books, {source_chars} chars, {len(queries)} probe queries.")
+
+    print(
+        f"{'config':>14} {'chunks':>7} {'tokens':>7} {'over_win':>8} {'stored/src':>10} "
+        f"{'index_mb':>9} {'embed_s':>8} {'search_ms':>9} {'hit@' + str(args.k):>6}"
+    )
+    for config in args.configs:
+        chunker = parse_config(config)
+        chunks = [text for records in books.values() for text, _ in chunker.split_records(records)]
+        tokens = np.asarray(counter.count_tokens(chunks))
+
+        start = time.perf_counter()
+        vectors = np.asarray(embeddings.embed_documents(chunks), dtype=np.float32)
+        embed_seconds = time.perf_counter() - start
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        latencies, hits = [], 0
+        normalized_chunks = [normalize(c) for c in chunks]
+        for probe, vector in zip(probes, query_vectors):
+            start = time.perf_counter()
+            scores = vectors @ vector
+            top = np.argpartition(-scores, min(args.k, len(scores)) - 1)[: args.k]
+            latencies.append(time.perf_counter() - start)
+            hits += any(probe in normalized_chunks[i] for i in top)
+
+        stored_chars = sum(len(c) for c in normalized_chunks)
+        index_mb = (vectors.nbytes + sum(len(c.encode("utf-8")) for c in chunks)) / 2**20
+        print(
+            f"{config:>14} {len(chunks):>7} {tokens.mean():>7.0f} "
+            f"{np.mean(tokens > MODEL_MAX_TOKENS - 2):>8.1%} {stored_chars / source_chars:>10.2f} "
+            f"{index_mb:>9.1f} {embed_seconds:>8.1f} {np.percentile(latencies, 50) * 1000:>9.3f} "
+            f"{hits / max(1, len(probes)):>6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
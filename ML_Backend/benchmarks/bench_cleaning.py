@@ -0,0 +1,81 @@
+"""
+Text cleaning throughput (MB/s) on a synthetic book-sized string.
+
+"old" is the previous preprocessing: the per-character surrogate scan and
+removal from extract_text (twice per book) followed by the regex in
+clean_json_text. "ascii" and "unicode" are the encoded-buffer cleaners in
+RAG/clean_json_text.py. The ascii result is checked against the old regex.
+Standard library only.
+
+    python benchmarks/bench_cleaning.py --mb 8
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from RAG.clean_json_text import clean_text
+
+OLD_RE = re.compile(r"[^\x09\x0A\x0D\x20-\x7E]+")
+
+
+def old_pipeline(text):
+    found = [ch for ch in text if 0xD800 <= ord(ch) <= 0xDFFF]
+    text = "".join(ch for ch in text if not (0xD800 <= ord(ch) <= 0xDFFF))
+    after = [ch for ch in text if 0xD800 <= ord(ch) <= 0xDFFF]
+    assert len(after) <= len(found)
+    return OLD_RE.sub("", text)
+
+
+def synthetic_book(mb, seed=0):
+    """Mostly ASCII prose with PDF-style noise: form feeds, smart quotes, lone surrogates."""
+    rng = random.Random(seed)
+    words = "grief anxiety partner sleep thought feeling change moment".split()
+    noise = ["\x0c", "\x00", "“", "”", "’", "é", "\ud83d", "—", "\x85"]
+    parts, size = [], 0
+    while size < mb * 2**20:
+        line = " ".join(rng.choice(words) for _ in range(12))
+        if rng.random() < 0.3:
+            line += rng.choice(noise)
+        parts.append(line)
+        size += len(line) + 1
+    return "\n".join(parts)
+
+
+def throughput(fn, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return len(text) / 2**20 / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Text cleaning throughput.")
+    parser.add_argument("--mb", type=float, default=8.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = synthetic_book(args.mb)
+    assert clean_text(text, "ascii") == OLD_RE.sub("", text)
+
+    modes = {
+        "old": old_pipeline,
+        "ascii": lambda t: clean_text(t, "ascii"),
+        "unicode": lambda t: clean_text(t, "unicode"),
+    }
+    print(f"{'mode':>8} {'MB/s':>9}")
+    for name, fn in modes.items():
+        print(f"{name:>8} {throughput(fn, text, args.repeat):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
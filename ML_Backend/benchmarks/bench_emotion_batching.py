@@ -0,0 +1,79 @@
+"""
+CPU throughput of GoEmotions inference with and without micro-batching.
+
+For each number of concurrent callers every caller sends `--requests`
+queries back to back through a MicroBatcher. max_batch_size=1 is the
+unbatched baseline (one forward pass per message, as before).
+
+    python benchmarks/bench_emotion_batching.py --callers 1 2 4 8 16 32 64
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from transformers import pipeline
+from batching import MicroBatcher
+
+QUERIES = [
+    "ok",
+    "thanks, that helps a bit",
+    "I am feeling very sad today. My dog passed away and I am devastated.",
+    "Work has been overwhelming and I can't sleep at night because of it.",
+    "I don't know",
+    "I had a fight with my best friend and I don't know how to fix it.",
+]
+
+
+async def run(batcher, callers, requests):
+    async def caller(offset):
+        for i in range(requests):
+            await batcher.asubmit(QUERIES[(offset + i) % len(QUERIES)])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller(c) for c in range(callers)))
+    return callers * requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emotion micro-batching throughput on CPU.")
+    parser.add_argument("--callers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--requests", type=int, default=8, help="Queries per caller.")
+    parser.add_argument("--batch_size", type=int, default=16)
+    parser.add_argument("--wait_ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    model = pipeline(
+        task="text-classification",
+        model="SamLowe/roberta-base-go_emotions",
+        top_k=None,
+        device=-1,
+    )
+
+    def classify_batch(queries):
+        return model(queries, top_k=3, batch_size=len(queries))
+
+    classify_batch(QUERIES)  # warm up
+
+    print(f"{'callers':>8} {'unbatched q/s':>14} {'batched q/s':>12} {'mean batch':>11}")
+    for callers in args.callers:
+        unbatched = MicroBatcher(classify_batch, max_batch_size=1, max_wait_ms=0)
+        batched = MicroBatcher(
+            classify_batch, max_batch_size=args.batch_size, max_wait_ms=args.wait_ms
+        )
+        base = asyncio.run(run(unbatched, callers, args.requests))
+        fast = asyncio.run(run(batched, callers, args.requests))
+        print(
+            f"{callers:>8} {base:>14.1f} {fast:>12.1f} "
+            f"{batched.stats()['mean_batch_size']:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Loading user embeddings for matching: the old single collection.get of
+every embedding, metadata record and document into a dict of lists, against
+the paginated export in RAG/pair_people.py (in memory and memory-mapped to an
+.npy file). Reports wall time and peak traced Python/NumPy memory.
+
+Synthetic users are written once into a temporary Chroma collection with
+precomputed 768-d vectors, so no embedding model is needed.
+
+    python benchmarks/bench_export.py --users 10000 100000 --page_size 5000
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import chromadb
+from RAG.pair_people import export_user_embeddings
+from bench_pairing import synthetic_users
+
+
+def fill_collection(directory, n, write_batch=5000):
+    collection = chromadb.PersistentClient(path=directory).get_or_create_collection("interests")
+    vectors = synthetic_users(n)
+    for start in range(0, n, write_batch):
+        end = min(start + write_batch, n)
+        collection.upsert(
+            ids=[f"user-{i}" for i in range(start, end)],
+            embeddings=vectors[start:end].tolist(),
+            documents=[f"interests of user {i}" for i in range(start, end)],
+            metadatas=[{"user_id": i} for i in range(start, end)],
+        )
+
+
+def old_load(directory):
+    """The previous load_user_embeddings: everything in one call, as lists."""
+    collection = chromadb.PersistentClient(path=directory).get_collection("interests")
+    results = collection.get(include=["embeddings", "metadatas", "documents"])
+    user_id_to_embedding = {}
+    for embedding, meta in zip(results["embeddings"], results["metadatas"]):
+        user_id_to_embedding[meta["user_id"]] = list(embedding)
+    return user_id_to_embedding
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="User embedding load: get-all vs paginated export.")
+    parser.add_argument("--users", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--page_size", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'users':>8} {'mode':>10} {'seconds':>9} {'peak MB':>9}")
+    for n in args.users:
+        directory = tempfile.mkdtemp(prefix="bench_export_")
+        try:
+            fill_collection(directory, n)
+            out_path = os.path.join(directory, "users.npy")
+            modes = {
+                "get-all": lambda: old_load(directory),
+                "paged": lambda: export_user_embeddings(
+                    directory, "interests", page_size=args.page_size
+                ),
+                "paged npy": lambda: export_user_embeddings(
+                    directory, "interests", page_size=args.page_size, out_path=out_path
+                ),
+            }
+            for mode, fn in modes.items():
+                result, seconds, peak = measure(fn)
+                del result
+                print(f"{n:>8} {mode:>10} {seconds:>9.2f} {peak:>9.0f}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Group formation on synthetic users: the old greedy anchor loop against the
+kNN-graph grouping in RAG/match_engine.py, on runtime and on the objective
+(mean intra-group cosine similarity, higher is better).
+
+The greedy version is only run up to --greedy_max users.
+
+    python benchmarks/bench_grouping.py --users 1000 5000 20000 --group_size 4
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from RAG.match_engine import form_groups, mean_intra_group_similarity, normalize_matrix
+from bench_pairing import synthetic_users
+
+
+def greedy_groups(embeddings, group_size):
+    """The previous group_users_in_fours, with the group size as a parameter."""
+    user_ids = list(range(len(embeddings)))
+
+    def cosine_similarity(a, b):
+        return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+
+    groups = []
+    while len(user_ids) >= group_size:
+        anchor_user = user_ids[0]
+        sims = [(other, cosine_similarity(embeddings[anchor_user], embeddings[other])) for other in user_ids[1:]]
+        sims.sort(key=lambda x: x[1], reverse=True)
+        group = [anchor_user] + [uid for uid, _ in sims[: group_size - 1]]
+        groups.append(group)
+        for uid in group:
+            user_ids.remove(uid)
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Group formation: greedy vs kNN graph.")
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--group_size", type=int, default=4)
+    parser.add_argument("--knn", type=int, nargs="+", default=[16, 32])
+    parser.add_argument("--greedy_max", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'users':>8} {'mode':>10} {'seconds':>9} {'groups':>7} {'objective':>10}")
+    for n in args.users:
+        raw = synthetic_users(n)
+        matrix = normalize_matrix(raw)
+        if n <= args.greedy_max:
+            start = time.perf_counter()
+            groups = greedy_groups(list(raw), args.group_size)
+            seconds = time.perf_counter() - start
+            score = mean_intra_group_similarity(matrix, groups)
+            print(f"{n:>8} {'greedy':>10} {seconds:>9.2f} {len(groups):>7} {score:>10.4f}")
+        for knn in args.knn:
+            start = time.perf_counter()
+            groups = form_groups(matrix, group_size=args.group_size, knn=knn)
+            seconds = time.perf_counter() - start
+            score = mean_intra_group_similarity(matrix, groups)
+            print(f"{n:>8} {'knn' + str(knn):>10} {seconds:>9.2f} {len(groups):>7} {score:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Ingest throughput (chunks/sec): the old per-book add_texts loop against the
+pipelined engine in RAG/ingest_pipeline.py, on CPU.
+
+Input is the extracted corpus, either the JSON from extract_text.py or a
+shard directory from `extract_text.py --shards`. Every run writes into its
+own temporary Chroma directory, so nothing is cached between runs.
+
+    python RAG/extract_text.py Books books_shards --shards
+    python benchmarks/bench_ingest.py books_shards --max_chunks 5000 \
+        --batch_sizes 32 64 128 --workers 1 2 4
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+from langchain_community.vectorstores import Chroma
+from RAG.embedding_registry import get_embeddings
+from RAG.chunk_store import chunk_id
+from RAG.ingest_pipeline import IngestPipeline
+from RAG.chunking import create_chunker
+from RAG.process_into_rag import load_documents
+
+
+def load_books(path, max_chunks):
+    """Split the corpus once, up front, so both modes embed the same chunks."""
+    chunker = create_chunker()
+    books, seen, total = [], set(), 0
+    for name, records in load_documents(path):
+        chunks = [c for c, _ in chunker.split_records(records) if chunk_id(c) not in seen]
+        seen.update(chunk_id(c) for c in chunks)
+        chunks = chunks[: max_chunks - total]
+        if chunks:
+            books.append((name, chunks))
+            total += len(chunks)
+        if total >= max_chunks:
+            break
+    return books, total
+
+
+def new_store(embeddings):
+    return Chroma(
+        collection_name="bench",
+        embedding_function=embeddings,
+        persist_directory=tempfile.mkdtemp(prefix="bench_ingest_"),
+    )
+
+
+def run_baseline(books, embeddings):
+    vectordb = new_store(embeddings)
+    start = time.perf_counter()
+    for name, chunks in books:
+        vectordb.add_texts(
+            chunks, metadatas=[{"source": name}] * len(chunks), ids=[chunk_id(c) for c in chunks]
+        )
+    return time.perf_counter() - start
+
+
+def run_pipeline(books, embeddings, batch_size, workers):
+    vectordb = new_store(embeddings)
+    pipeline = IngestPipeline(vectordb, embeddings, batch_size=batch_size, workers=workers)
+    for name, chunks in books:
+        pipeline.submit([chunk_id(c) for c in chunks], chunks, [{"source": name}] * len(chunks))
+    return pipeline.close()["seconds"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest throughput: per-book loop vs pipeline.")
+    parser.add_argument("corpus", help="Extracted JSON file or shard directory.")
+    parser.add_argument("--max_chunks", type=int, default=5000)
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    books, total = load_books(args.corpus, args.max_chunks)
+    print(f"[INFO] {total} chunks from {len(books)} books.")
+    embeddings = get_embeddings(device="cpu")
+    embeddings.embed_documents(["warm up"])
+
+    print(f"{'mode':>10} {'batch':>6} {'workers':>8} {'seconds':>9} {'chunks/s':>9}")
+    seconds = run_baseline(books, embeddings)
+    print(f"{'loop':>10} {'-':>6} {'-':>8} {seconds:>9.1f} {total / seconds:>9.1f}")
+    for batch_size in args.batch_sizes:
+        for workers in args.workers:
+            seconds = run_pipeline(books, embeddings, batch_size, workers)
+            print(
+                f"{'pipeline':>10} {batch_size:>6} {workers:>8} "
+                f"{seconds:>9.1f} {total / seconds:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+New-signup matching on synthetic users: recomputing a user's neighbours from
+a full reload (dict of embeddings -> normalised matrix) against the
+incremental RAG/match_index.py (upsert one row, one matrix-vector product).
+
+    python benchmarks/bench_match_index.py --users 10000 100000 --signups 200
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from RAG.match_engine import to_matrix
+from RAG.match_index import MatchIndex
+from bench_pairing import synthetic_users
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="New-signup matching: full reload vs match index.")
+    parser.add_argument("--users", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--signups", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'users':>8} {'mode':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for n in args.users:
+        raw = synthetic_users(n + args.signups)
+        existing = {uid: raw[uid] for uid in range(n)}
+        new_users = range(n, n + args.signups)
+
+        # Full reload per signup: too slow to repeat, so time a few.
+        latencies = []
+        for uid in list(new_users)[:3]:
+            start = time.perf_counter()
+            user_ids, matrix = to_matrix({**existing, uid: raw[uid]})
+            scores = matrix @ matrix[-1]
+            scores[-1] = -np.inf
+            top = np.argpartition(-scores, args.k)[: args.k]
+            [user_ids[row] for row in top[np.argsort(-scores[top])]]
+            latencies.append(time.perf_counter() - start)
+        print(f"{n:>8} {'reload':>10} {percentile(latencies, 50) * 1000:>9.1f} {percentile(latencies, 99) * 1000:>9.1f}")
+
+        index_dir = tempfile.mkdtemp(prefix="match_index_")
+        try:
+            index = MatchIndex(index_dir)
+            index.rebuild(existing)
+            latencies = []
+            for uid in new_users:
+                start = time.perf_counter()
+                index.upsert(uid, raw[uid])
+                index.similar(uid, k=args.k)
+                latencies.append(time.perf_counter() - start)
+            index.close()
+            print(f"{n:>8} {'index':>10} {percentile(latencies, 50) * 1000:>9.1f} {percentile(latencies, 99) * 1000:>9.1f}")
+
+            start = time.perf_counter()
+            reopened = MatchIndex(index_dir)
+            assert len(reopened) == n + args.signups
+            reopened.close()
+            print(f"[INFO] Reopened {n + args.signups} users in {time.perf_counter() - start:.2f}s.")
+        finally:
+            shutil.rmtree(index_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Top-k user pairing on synthetic embeddings: the old per-pair Python loop
+against the blocked matrix-multiply engine in RAG/match_engine.py.
+
+Users are drawn around a few hundred interest clusters in 768 dimensions
+(all-mpnet-base-v2 size). The loop is only run up to --loop_max users; past
+that its time is extrapolated from a sample of pairs. Results of the engine
+are checked against the loop whenever both run.
+
+    python benchmarks/bench_pairing.py --users 1000 10000 100000 --workers 0 4
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from RAG.match_engine import normalize_matrix, top_k_pairs
+
+
+def synthetic_users(n, dim=768, clusters=300, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    return centers[labels] + 0.8 * rng.normal(size=(n, dim)).astype(np.float32)
+
+
+def loop_top_k(embeddings, k, max_pairs=None):
+    """The previous implementation: every pair in Python, then a full sort."""
+
+    def cosine_similarity(a, b):
+        return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+
+    similarities = []
+    n = len(embeddings)
+    for i in range(n):
+        for j in range(i + 1, n):
+            similarities.append((i, j, cosine_similarity(embeddings[i], embeddings[j])))
+            if max_pairs and len(similarities) >= max_pairs:
+                return similarities
+    similarities.sort(key=lambda x: x[2], reverse=True)
+    return similarities[:k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Top-k pairing: loop vs blocked engine.")
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 4])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--block_size", type=int, default=2048)
+    parser.add_argument("--loop_max", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'users':>8} {'mode':>12} {'seconds':>10}")
+    for n in args.users:
+        raw = synthetic_users(n)
+        loop_pairs = None
+        if n <= args.loop_max:
+            start = time.perf_counter()
+            loop_pairs = loop_top_k(list(raw), args.k)
+            seconds = time.perf_counter() - start
+            print(f"{n:>8} {'loop':>12} {seconds:>10.2f}")
+        else:
+            sample = 200_000
+            start = time.perf_counter()
+            loop_top_k(list(raw[:1000]), args.k, max_pairs=sample)
+            seconds = (time.perf_counter() - start) * (n * (n - 1) / 2) / sample
+            print(f"{n:>8} {'loop (est.)':>12} {seconds:>10.0f}")
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            matrix = normalize_matrix(raw)
+            pairs = top_k_pairs(matrix, k=args.k, block_size=args.block_size, workers=workers)
+            seconds = time.perf_counter() - start
+            mode = "engine" if not workers else f"engine x{workers}"
+            print(f"{n:>8} {mode:>12} {seconds:>10.2f}")
+            if loop_pairs is not None:
+                assert [(i, j) for i, j, _ in pairs] == [(i, j) for i, j, _ in loop_pairs]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Prompt size over a synthetic 50-turn session, before and after structured
+turn records.
+
+"before" persists every user turn with the retrieved Document repr and the
+emotion/strategy blobs appended (the old Chatbot.chat behaviour); "after"
+persists make_user_turn() records and replays them with build_prompt_history().
+Token counts use the ~4 chars/token estimate from turn_records.
+
+    python benchmarks/bench_prompt_size.py --turns 50
+"""
+
+import os
+import sys
+import argparse
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from langchain_core.documents import Document
+from langchain_core.messages import HumanMessage, AIMessage
+from TherapyBot.prompts import system_prompt
+from turn_records import (
+    approx_token_count,
+    count_message_tokens,
+    make_user_turn,
+    build_prompt_history,
+)
+
+
+def synthetic_turn(i):
+    query = f"Turn {i}: I keep feeling anxious about work and I can't sleep properly."
+    rag_docs = [
+        Document(
+            id=f"chunk-{i}-{j}",
+            metadata={"source": f"Book {j}.pdf"},
+            page_content=("Anxiety often shows up as racing thoughts at night. " * 20),
+        )
+        for j in range(2)
+    ]
+    emotion_result = [
+        {"label": "nervousness", "score": 0.71},
+        {"label": "fear", "score": 0.12},
+        {"label": "sadness", "score": 0.05},
+    ]
+    reasoning = "The user keeps returning to sleep problems, so reflect and suggest. " * 3
+    strategy_list = ["Reflection of feelings", "Providing Suggestions"]
+    reply = "That sounds exhausting. What usually goes through your mind at night? " * 3
+    return query, rag_docs, emotion_result, reasoning, strategy_list, reply
+
+
+def legacy_user_message(query, rag_docs, emotion_result, reasoning, strategy_list):
+    return HumanMessage(
+        content=f"""{query}
+Relevant context from retrieved documents:
+{rag_docs}
+**Detected Emotions with their probabilities:** {emotion_result}
+(*This represents the user's emotional state.*)
+The following Therapy Strategy has been predicted to help the user. Use it to help the user.
+**Reasoning for strategy to be used:** {reasoning}
+**Detected Strategy:** {strategy_list}"""
+    )
+
+
+def current_turn_tokens(query, rag_docs, emotion_result, reasoning, strategy_list):
+    # The per-turn user block is identical in both modes.
+    context = "\n\n".join(doc.page_content for doc in rag_docs)
+    return approx_token_count(
+        f"{context}\n{query}\n{emotion_result}\n{reasoning}\n{strategy_list}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens per turn, before/after.")
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+
+    system_tokens = approx_token_count(system_prompt.template)
+    legacy_history, structured_history = [], []
+    legacy_total = structured_total = 0
+
+    print(f"{'turn':>5} {'before':>10} {'after':>10}")
+    for i in range(1, args.turns + 1):
+        query, rag_docs, emotion_result, reasoning, strategy_list, reply = synthetic_turn(i)
+        current = system_tokens + current_turn_tokens(
+            query, rag_docs, emotion_result, reasoning, strategy_list
+        )
+
+        before = current + count_message_tokens(legacy_history)
+        after = current + count_message_tokens(build_prompt_history(structured_history))
+        legacy_total += before
+        structured_total += after
+        if i == 1 or i % 10 == 0:
+            print(f"{i:>5} {before:>10} {after:>10}")
+
+        legacy_history += [
+            legacy_user_message(query, rag_docs, emotion_result, reasoning, strategy_list),
+            AIMessage(content=reply),
+        ]
+        structured_history += [
+            make_user_turn(query, rag_docs, emotion_result, reasoning, strategy_list),
+            AIMessage(content=reply),
+        ]
+
+    print(
+        f"\n[INFO] Total prompt tokens over {args.turns} turns: "
+        f"before={legacy_total}, after={structured_total} "
+        f"({1 - structured_total / legacy_total:.1%} fewer)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Retrieval latency (p50/p99) under concurrency.
+
+"baseline" is the old path: retriever.invoke in a worker thread, one
+single-item embedding per call. "service" is aquery_retriever: cached,
+micro-batched query embeddings plus the vector search in a thread.
+Use --unique to make every query distinct so only batching is measured.
+Run from ML_Backend so books_chroma_db is found.
+
+    python benchmarks/bench_retrieval.py --concurrency 1 4 16 64
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from langchain_chroma import Chroma
+from RAG.embedding_registry import get_embeddings
+from RAG.retreive_books import aquery_retriever
+
+QUERIES = [
+    "How do I go about the loss of someone?",
+    "I feel anxious all the time",
+    "my partner and I keep fighting",
+    "I can't stop drinking",
+    "how do I deal with negative thoughts",
+    "I feel lonely",
+    "my child has tantrums at school",
+    "I can't sleep because of stress",
+    "how can I be more confident at work",
+    "I think I have ADHD",
+]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+async def run(search, concurrency, requests, unique):
+    latencies = []
+
+    async def caller(c):
+        for i in range(requests):
+            query = QUERIES[(c + i) % len(QUERIES)]
+            if unique:
+                query = f"{query} ({c}-{i})"
+            start = time.perf_counter()
+            await search(query)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(caller(c) for c in range(concurrency)))
+    return percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval latency under concurrency.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=20, help="Queries per caller.")
+    parser.add_argument("--unique", action="store_true")
+    args = parser.parse_args()
+
+    baseline_db = Chroma(
+        persist_directory="books_chroma_db",
+        collection_name="rag_docs",
+        embedding_function=get_embeddings(),
+    )
+    baseline_retriever = baseline_db.as_retriever(search_kwargs={"k": 2})
+    modes = {
+        "baseline": lambda q: asyncio.to_thread(baseline_retriever.invoke, q),
+        "service": aquery_retriever,
+    }
+
+    print(f"{'mode':>10} {'callers':>8} {'p50':>10} {'p99':>10}")
+    for name, search in modes.items():
+        asyncio.run(search(QUERIES[0]))  # warm up
+        for concurrency in args.concurrency:
+            p50, p99 = asyncio.run(run(search, concurrency, args.requests, args.unique))
+            print(f"{name:>10} {concurrency:>8} {p50:>8.1f}ms {p99:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
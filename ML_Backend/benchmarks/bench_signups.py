@@ -0,0 +1,132 @@
+"""
+Signup throughput (signups/sec) for user interest uploads: the old path, one
+add_documents + persist per signup, against the write-behind
+UserEmbeddingWriter in RAG/create_user_embeds.py, at a given number of
+concurrent requests. Every run writes into its own temporary Chroma
+directory and match index.
+
+    python benchmarks/bench_signups.py --signups 500 --concurrency 32 \
+        --batch_sizes 16 64 --flush_ms 20 50
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+os.environ.setdefault("MATCH_INDEX_DIR", tempfile.mkdtemp(prefix="bench_match_"))
+
+from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
+from RAG.create_user_embeds import UserEmbeddingWriter
+from RAG.embedding_registry import get_embeddings
+from RAG.match_index import MatchIndex
+
+INTERESTS = [
+    "hiking", "painting", "chess", "jazz", "cooking", "running", "poetry",
+    "gardening", "photography", "yoga", "video games", "astronomy", "baking",
+    "cycling", "board games", "meditation", "reading fantasy novels", "dancing",
+]
+
+
+def signups(n, seed=0):
+    """Synthetic uploads; about a tenth are edits by users who signed up earlier."""
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        user_id = rng.randrange(i) if i and rng.random() < 0.1 else i
+        items.append((user_id, " ".join(rng.sample(INTERESTS, 4))))
+    return items
+
+
+def new_store(embeddings, directory):
+    return Chroma(collection_name="interests", embedding_function=embeddings, persist_directory=directory)
+
+
+async def run_concurrently(items, concurrency, upload):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(item):
+        async with semaphore:
+            await upload(*item)
+
+    await asyncio.gather(*(one(item) for item in items))
+
+
+def run_baseline(items, embeddings, concurrency):
+    directory = tempfile.mkdtemp(prefix="bench_signups_")
+    vectordb = new_store(embeddings, directory)
+
+    async def upload(user_id, text):
+        loop = asyncio.get_running_loop()
+        doc = Document(page_content=text, metadata={"user_id": user_id})
+        await loop.run_in_executor(None, vectordb.add_documents, [doc])
+        await loop.run_in_executor(None, vectordb.persist)
+
+    start = time.perf_counter()
+    asyncio.run(run_concurrently(items, concurrency, upload))
+    seconds = time.perf_counter() - start
+    count = vectordb._collection.count()
+    shutil.rmtree(directory, ignore_errors=True)
+    return seconds, count, len(items)
+
+
+def run_writer(items, embeddings, concurrency, batch_size, flush_ms, durable):
+    directory = tempfile.mkdtemp(prefix="bench_signups_")
+    index_dir = tempfile.mkdtemp(prefix="bench_match_")
+    vectordb = new_store(embeddings, directory)
+    index = MatchIndex(index_dir)
+    writer = UserEmbeddingWriter(
+        vectordb, embeddings, index, max_batch_size=batch_size, flush_ms=flush_ms, durable=durable
+    )
+
+    start = time.perf_counter()
+    asyncio.run(run_concurrently(items, concurrency, writer.asubmit))
+    writer.flush()
+    seconds = time.perf_counter() - start
+    count = vectordb._collection.count()
+    persists = writer.stats()["persists"]
+    index.close()
+    shutil.rmtree(directory, ignore_errors=True)
+    shutil.rmtree(index_dir, ignore_errors=True)
+    return seconds, count, persists
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Signups/sec: per-signup writes vs write-behind batching.")
+    parser.add_argument("--signups", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[16, 64])
+    parser.add_argument("--flush_ms", type=float, nargs="+", default=[20.0, 50.0])
+    args = parser.parse_args()
+
+    items = signups(args.signups)
+    embeddings = get_embeddings()
+    embeddings.embed_documents(["warm up"])
+    unique_users = len({user_id for user_id, _ in items})
+    print(f"[INFO] {len(items)} uploads from {unique_users} users, {args.concurrency} concurrent.")
+    print(f"{'mode':>28} {'signups/s':>10} {'vectors':>8} {'persists':>9}")
+
+    seconds, count, persists = run_baseline(items, embeddings, args.concurrency)
+    print(f"{'per-signup':>28} {len(items) / seconds:>10.1f} {count:>8} {persists:>9}")
+    for durable in (True, False):
+        for batch_size in args.batch_sizes:
+            for flush_ms in args.flush_ms:
+                seconds, count, persists = run_writer(
+                    items, embeddings, args.concurrency, batch_size, flush_ms, durable
+                )
+                mode = f"batch {batch_size} / {flush_ms:g}ms" + ("" if durable else " async")
+                print(f"{mode:>28} {len(items) / seconds:>10.1f} {count:>8} {persists:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Per-call latency of predict_therapy_strategy over many sequential calls.
+
+With the old shared chat_session every call resent all earlier predictions,
+so latency grew with the call count. The stateless path should stay flat.
+Conversation windows are taken from StrategyBot/test.csv. Needs GOOGLE_API_KEY1.
+
+    python benchmarks/bench_strategy_latency.py --calls 1000
+"""
+
+import os
+import sys
+import csv
+import time
+import asyncio
+import argparse
+import statistics
+
+# Points to the parent directory containing EmotionBot, StrategyBot, TherapyBot
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from StrategyBot.bot import predict_therapy_strategy
+from StrategyBot.utils import parse_conversation
+
+
+def load_windows(path, limit=200):
+    """Conversation windows ending with a user message, from the ESConv CSV."""
+    windows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            messages = parse_conversation(row["text"])
+            if messages and messages[-1]["role"] == "usr":
+                windows.append(messages[-8:])
+            if len(windows) >= limit:
+                break
+    return windows
+
+
+async def main_async(args):
+    windows = load_windows(os.path.join(BASE_DIR, "StrategyBot", "test.csv"))
+    latencies = []
+    for i in range(args.calls):
+        start = time.perf_counter()
+        await predict_therapy_strategy(windows[i % len(windows)])
+        latencies.append(time.perf_counter() - start)
+
+    print(f"{'calls':>12} {'p50':>8} {'mean':>8} {'max':>8}")
+    for start in range(0, args.calls, args.bucket):
+        bucket = latencies[start : start + args.bucket]
+        print(
+            f"{start + 1:>5}-{start + len(bucket):<6} {statistics.median(bucket):>7.3f}s "
+            f"{statistics.mean(bucket):>7.3f}s {max(bucket):>7.3f}s"
+        )
+    first = statistics.median(latencies[: args.bucket])
+    last = statistics.median(latencies[-args.bucket :])
+    print(f"\n[INFO] p50 last bucket / first bucket: {last / first:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential strategy prediction latency.")
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--bucket", type=int, default=100)
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,6 @@ import asyncio
 from langchain.prompts.prompt import PromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.chains import ConversationChain
-from langchain.memory import ConversationSummaryBufferMemory
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.prompts import (
@@ -18,7 +17,10 @@ from TherapyBot.prompts import system_prompt, user_prompt, pet_prompt
 from EmotionBot.bot import emotion_detection
 from StrategyBot.bot import predict_therapy_strategy
 from langchain.schema import SystemMessage, HumanMessage, AIMessage
-from RAG.retreive_books import query_retriever
+from RAG.retreive_books import aquery_retriever
+from session_store import create_session_store
+from turn_records import make_user_turn
+from history_compaction import HistoryCompactor
 
 
 class Chatbot:
@@ -66,34 +68,27 @@ The following Therapy Strategy has been predicted to help the user. Use it to he
             # Create a new chain by piping the prompt with the LLM.
             self.chain.append(self.prompt | llm_instance)
 
-        # Initialize chat history and add the system prompt.
-        self.chat_history = ChatMessageHistory()
-        self.chat_history.add_message(system_prompt)
+        # Bounded session store (see session_store.py for the env configuration).
+        self.store = create_session_store()
 
-        # Initialize ConversationSummaryBufferMemory with the chat history.
-        self.memory = ConversationSummaryBufferMemory(
-            llm=self.llm[0],
-            max_token_limit=1000,
-            chat_memory=self.chat_history,
+        # Older turns are folded into a rolling summary once the verbatim
+        # history exceeds the token budget.
+        self.compactor = HistoryCompactor(
+            llms=self.llm,
+            store=self.store,
+            token_budget=int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", 1000)),
         )
-        self.store = {}
         print("Chatbot initialised.\n")
 
     def get_message_history(self, session_id: str, user_id: int) -> ChatMessageHistory:
-        if user_id not in self.store:
-            self.store[user_id] = {}  # Initialize user dictionary if not present
-        if session_id not in self.store[user_id]:
-            self.store[user_id][
-                session_id
-            ] = ChatMessageHistory()  # Initialize session chat history
-
-        return self.store[user_id][session_id]
+        # Returns a cached history, rehydrating it from the backend if it was evicted.
+        return self.store.get(user_id, session_id)
 
     async def chat(self, query: str, session_id: str, user_id: int):
-        message_history = self.get_message_history(session_id, user_id)
+        message_history = await self.store.aget(user_id, session_id)
 
         # Retrieve relevant documents from the RAG database asynchronously.
-        rag_docs_task = asyncio.create_task(asyncio.to_thread(query_retriever, query))
+        rag_docs_task = asyncio.create_task(aquery_retriever(query))
 
         # Run emotion detection and therapy strategy prediction concurrently.
         emotion_result_task = asyncio.create_task(emotion_detection(query))
@@ -113,6 +108,12 @@ The following Therapy Strategy has been predicted to help the user. Use it to he
         extracted_contents = [doc.page_content for doc in rag_docs]
         combined_context = "\n\n".join(extracted_contents)
 
+        # Rolling summary plus the turns it does not cover yet, replayed as raw
+        # text with compact metadata references.
+        prompt_history = self.compactor.prompt_history(
+            user_id, session_id, message_history.messages
+        )
+
         response = ""
 
         # --- Round Robin with fallback attempts ---
@@ -129,7 +130,7 @@ The following Therapy Strategy has been predicted to help the user. Use it to he
                 async for token in self.chain[current_index].astream(
                     {
                         "input": query,
-                        "history": message_history.messages,
+                        "history": prompt_history,
                         "emotion_result": emotion_result,
                         "reasoning_for_strategy": reasoning,
                         "strategy_result": strategy_list,
@@ -150,18 +151,19 @@ The following Therapy Strategy has been predicted to help the user. Use it to he
                 if attempts >= max_attempts:
                     raise Exception("All API keys failed.") from e
 
-        # Update chat history with the user input and AI response.
-        self.store[user_id][session_id].add_user_message(
-            f"""{query}
-Relevant context from retrieved documents:
-{rag_docs}
-**Detected Emotions with their probabilities:** {emotion_result}
-(*This represents the user's emotional state.*)
-The following Therapy Strategy has been predicted to help the user. Use it to help the user.
-**Reasoning for strategy to be used:** {reasoning}
-**Detected Strategy:** {strategy_list}"""
+        # Update chat history with the raw user input (retrieval, emotion and
+        # strategy results are kept as metadata, not replayed verbatim) and AI response.
+        message_history = await self.store.aadd_messages(
+            user_id,
+            session_id,
+            [
+                make_user_turn(query, rag_docs, emotion_result, reasoning, strategy_list),
+                AIMessage(content=response),
+            ],
         )
-        self.store[user_id][session_id].add_ai_message(response)
+
+        # Summarise older turns in the background, after the reply has streamed.
+        self.compactor.schedule(user_id, session_id, message_history.messages)
 
 
 # Test code in main
@@ -172,7 +174,8 @@ if __name__ == "__main__":
         while True:
             query = input("\n>> User: ")
             if query.lower() == "exit":
-                print(model.store.get("bh", 123))
+                print(model.get_message_history("bh", 123))
+                print(model.store.stats())
                 break
             print(">> Pet: ")
             async for response in model.chat(query, "bh", 123):
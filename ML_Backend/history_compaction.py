@@ -0,0 +1,96 @@
+import asyncio
+import logging
+
+from langchain.memory.prompt import SUMMARY_PROMPT
+from langchain_core.messages import AIMessage, HumanMessage, get_buffer_string
+
+from turn_records import build_prompt_history, count_message_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryCompactor:
+    """
+    Token-budgeted rolling history for the main chat chain.
+
+    The prompt history is the session's rolling summary followed by every
+    message it does not cover yet, verbatim. After a reply has streamed,
+    `schedule()` folds the oldest verbatim turns into the summary in a
+    background task until the verbatim part fits in `token_budget`, so
+    summarisation never delays the first token. The summary and the number of
+    messages it covers are cached in the session store, so each turn is only
+    summarised once.
+    """
+
+    def __init__(self, llms: list, store, token_budget: int = 1000):
+        self.llms = llms
+        self.store = store
+        self.token_budget = token_budget
+        self._running = {}  # (user_id, session_id) -> asyncio.Task
+
+    def prompt_history(self, user_id, session_id, messages: list) -> list:
+        """
+        History to send to the model: the summary as a leading user/assistant
+        exchange, then the uncovered turns. The chain's system prompt must stay
+        the only system message, as Gemini rejects one anywhere but first.
+        """
+        summary, upto = self.store.get_summary(user_id, session_id)
+        history = build_prompt_history(messages[upto:])
+        if summary:
+            history[:0] = [
+                HumanMessage(content=f"Summary of our earlier conversation:\n{summary}"),
+                AIMessage(content="Thanks, I'll keep that in mind."),
+            ]
+        return history
+
+    def split_point(self, messages: list, upto: int) -> int:
+        """
+        Index before which messages should be summarised so that the verbatim
+        remainder fits in the token budget. Cuts only fall on user turns so a
+        user message is never separated from its reply.
+        """
+        tokens = [count_message_tokens(build_prompt_history([m])) for m in messages]
+        remaining = sum(tokens[upto:])
+        cut = upto
+        while cut < len(messages) and remaining > self.token_budget:
+            remaining -= tokens[cut]
+            cut += 1
+            while cut < len(messages) and messages[cut].type != "human":
+                remaining -= tokens[cut]
+                cut += 1
+        # Always keep the latest exchange verbatim.
+        return min(cut, max(upto, len(messages) - 2))
+
+    def schedule(self, user_id, session_id, messages: list) -> None:
+        """Start background compaction of the session if it is over budget."""
+        key = (user_id, session_id)
+        running = self._running.get(key)
+        if running is not None and not running.done():
+            return  # the next turn will pick up whatever is left
+        _, upto = self.store.get_summary(user_id, session_id)
+        if self.split_point(messages, upto) <= upto:
+            return
+        task = asyncio.create_task(self.compact(user_id, session_id, list(messages)))
+        self._running[key] = task
+        task.add_done_callback(lambda _: self._running.pop(key, None))
+
+    async def compact(self, user_id, session_id, messages: list) -> None:
+        summary, upto = self.store.get_summary(user_id, session_id)
+        cut = self.split_point(messages, upto)
+        if cut <= upto:
+            return
+
+        prompt = SUMMARY_PROMPT.format(
+            summary=summary,
+            new_lines=get_buffer_string(build_prompt_history(messages[upto:cut])),
+        )
+        for index, llm in enumerate(self.llms):
+            try:
+                result = await llm.ainvoke(prompt)
+                break
+            except Exception as e:
+                logger.warning(f"Summarisation failed with LLM at index {index}: {e}")
+        else:
+            return
+
+        self.store.set_summary(user_id, session_id, result.content.strip(), cut)
@@ -0,0 +1,180 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def normalize_query(text: str) -> str:
+    """
+    Collapse whitespace so "ok " and "ok" share an entry. Case is kept, as
+    cased models score "OK" and "ok" differently.
+    """
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Bounded LRU + TTL cache for JSON-serialisable prediction results.
+
+    With `path` set, entries are also written to a SQLite file so several
+    worker processes on one host can share results; a local miss falls back to
+    the file before the caller computes the value. Expired rows are deleted
+    when the file is opened and every `purge_every` writes. From async code
+    use `aget` / `aset`, which run the SQLite I/O in a worker thread.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=3600, path=None, name="cache", purge_every=1000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self.purge_every = purge_every
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()  # serialises use of the SQLite connection
+        self._writes = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.purged = 0
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS "{name}" (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )"""
+            )
+            self._conn.commit()
+            self._purge()
+
+    def get(self, key):
+        """Return the cached value or None."""
+        value = self._get_local(key)
+        if value is None and self._conn is not None:
+            value = self._get_shared(key)
+        if value is None:
+            with self._lock:
+                self.misses += 1
+        return value
+
+    async def aget(self, key):
+        """`get` without blocking the event loop on the SQLite file."""
+        value = self._get_local(key)
+        if value is None and self._conn is not None:
+            value = await asyncio.to_thread(self._get_shared, key)
+        if value is None:
+            with self._lock:
+                self.misses += 1
+        return value
+
+    def set(self, key, value) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._insert(key, value, expires_at)
+        if self._conn is not None:
+            self._write(key, value, expires_at)
+
+    async def aset(self, key, value) -> None:
+        """`set` without blocking the event loop on the SQLite file."""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._insert(key, value, expires_at)
+        if self._conn is not None:
+            await asyncio.to_thread(self._write, key, value, expires_at)
+
+    def _get_local(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+        return None
+
+    def _get_shared(self, key):
+        now = time.time()
+        with self._db_lock:
+            row = self._conn.execute(
+                f'SELECT value, expires_at FROM "{self.name}" WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        value = json.loads(row[0])
+        with self._lock:
+            self._insert(key, value, row[1])
+            self.shared_hits += 1
+        return value
+
+    def _write(self, key, value, expires_at) -> None:
+        with self._db_lock:
+            with self._conn:
+                self._conn.execute(
+                    f'INSERT OR REPLACE INTO "{self.name}" (key, value, expires_at) VALUES (?, ?, ?)',
+                    (key, json.dumps(value), expires_at),
+                )
+            self._writes += 1
+            purge = self._writes % self.purge_every == 0
+        if purge:
+            self._purge()
+
+    def _purge(self) -> None:
+        """Delete expired rows from the SQLite file."""
+        with self._db_lock:
+            with self._conn:
+                deleted = self._conn.execute(
+                    f'DELETE FROM "{self.name}" WHERE expires_at < ?', (time.time(),)
+                ).rowcount
+        with self._lock:
+            self.purged += deleted
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "purged": self.purged,
+            }
+
+    def _insert(self, key, value, expires_at) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+def create_result_cache(name: str) -> ResultCache:
+    """
+    Build a cache configured through environment variables:
+
+        RESULT_CACHE_SIZE   entries kept per process, defaults to 10000
+        RESULT_CACHE_TTL    seconds an entry stays valid, defaults to 3600
+        RESULT_CACHE_PATH   optional SQLite file shared by the workers on a host
+    """
+    return ResultCache(
+        max_entries=int(os.getenv("RESULT_CACHE_SIZE", 10000)),
+        ttl_seconds=float(os.getenv("RESULT_CACHE_TTL", 3600)),
+        path=os.getenv("RESULT_CACHE_PATH") or None,
+        name=name,
+    )
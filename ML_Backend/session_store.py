@@ -0,0 +1,375 @@
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from langchain_community.chat_message_histories import ChatMessageHistory
+from langchain_core.messages import message_to_dict, messages_from_dict
+
+
+class _Entry:
+    __slots__ = ("history", "persisted", "cursor", "last_access", "size", "summary")
+
+    def __init__(self, history: ChatMessageHistory, persisted: int = 0, cursor=None, summary=None):
+        self.history = history
+        self.persisted = persisted  # number of messages already written to the backend
+        self.cursor = cursor  # backend position of the last message seen
+        self.last_access = time.monotonic()
+        self.size = 0
+        # (summary text, number of leading messages it covers)
+        self.summary = summary or ("", 0)
+
+
+def estimate_history_size(history: ChatMessageHistory) -> int:
+    """
+    Rough memory footprint of a history in bytes (message text plus per-message overhead).
+    """
+    return sum(len(str(m.content)) + 200 for m in history.messages)
+
+
+class SessionStore:
+    """
+    Bounded, evicting cache of ChatMessageHistory objects keyed by (user_id, session_id).
+
+    Sessions are evicted least-recently-used first when there are more than
+    `max_sessions` of them or their estimated size exceeds `max_bytes`, and
+    expire after `ttl_seconds` without access. Subclasses may override
+    `_load_after` / `_append` (and `_load_summary` / `_save_summary`) to
+    persist sessions so that evicted ones can be rehydrated lazily on the next
+    access.
+    """
+
+    def __init__(self, max_sessions=1000, ttl_seconds=None, max_bytes=None):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rehydrations = 0
+
+    # --- Backend hooks -----------------------------------------------------
+
+    def _load_after(self, key, cursor) -> tuple:
+        """
+        Return (messages, cursor): persisted messages of `key` after backend
+        position `cursor` (all of them for None) and the position of the last.
+        """
+        return [], cursor
+
+    def _append(self, key, messages: list, cursor) -> tuple:
+        """
+        Persist `messages` after whatever the backend already holds. Returns
+        (earlier, cursor): messages other writers stored after `cursor`,
+        which now precede `messages`, and the position of the last message.
+        """
+        return [], cursor
+
+    def _load_summary(self, key):
+        """Return the persisted (summary, covered message count) of `key`, if any."""
+        return None
+
+    def _save_summary(self, key, summary: str, upto: int) -> None:
+        """Persist the rolling summary of `key`."""
+
+    # --- Public API --------------------------------------------------------
+
+    def get(self, user_id, session_id) -> ChatMessageHistory:
+        """
+        The session's history. Turns written by other workers sharing the
+        backend are read without holding the lock; use `aget` on an event loop.
+        """
+        key = (str(user_id), str(session_id))
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                entry.last_access = time.monotonic()
+                cursor = entry.cursor
+            else:
+                self.misses += 1
+
+        if entry is not None:
+            newer, cursor_after = self._load_after(key, cursor)
+            with self._lock:
+                if newer and entry.cursor == cursor:
+                    self._insert_persisted(entry, newer, cursor_after)
+                    self._resize(entry)
+            return entry.history
+
+        messages, cursor = self._load_after(key, None)
+        summary = self._load_summary(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if messages:
+                    self.rehydrations += 1
+                entry = _Entry(
+                    ChatMessageHistory(messages=messages),
+                    persisted=len(messages),
+                    cursor=cursor,
+                    summary=summary,
+                )
+                self._entries[key] = entry
+                self._resize(entry)
+                self._evict(keep=key)
+            entry.last_access = time.monotonic()
+            return entry.history
+
+    async def aget(self, user_id, session_id) -> ChatMessageHistory:
+        return await asyncio.to_thread(self.get, user_id, session_id)
+
+    def add_messages(self, user_id, session_id, messages: list) -> ChatMessageHistory:
+        """
+        Append a finished turn to the session and write it to the backend.
+        If the session was evicted or expired while the turn was in flight,
+        it is rehydrated first, so the turn is not lost. Returns the
+        session's current history.
+        """
+        history = self.get(user_id, session_id)
+        key = (str(user_id), str(session_id))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.history is not history:
+                # Evicted again in between: its flushed messages are in the backend.
+                return self.add_messages(user_id, session_id, messages)
+            entry.history.add_messages(messages)
+            self._flush(key, entry)
+            self._resize(entry)
+            self._evict(keep=key)
+            return entry.history
+
+    async def aadd_messages(self, user_id, session_id, messages: list) -> ChatMessageHistory:
+        return await asyncio.to_thread(self.add_messages, user_id, session_id, messages)
+
+    def persist(self, user_id, session_id) -> None:
+        """
+        Write messages added to the session's history since the last call to
+        the backend and re-check the memory budget now that the session has grown.
+        """
+        key = (str(user_id), str(session_id))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            self._flush(key, entry)
+            self._resize(entry)
+            self._evict(keep=key)
+
+    def get_summary(self, user_id, session_id):
+        """
+        Return (summary, upto): the rolling summary of the session and how many
+        of its leading messages it covers. ("", 0) when nothing is summarised.
+        """
+        key = (str(user_id), str(session_id))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry.summary
+            return self._load_summary(key) or ("", 0)
+
+    def set_summary(self, user_id, session_id, summary: str, upto: int) -> None:
+        key = (str(user_id), str(session_id))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.summary = (summary, upto)
+            self._save_summary(key, summary, upto)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "sessions": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "rehydrations": self.rehydrations,
+            }
+
+    # --- Internals ---------------------------------------------------------
+
+    def _insert_persisted(self, entry: _Entry, messages: list, cursor) -> None:
+        # Backend order wins: other workers' turns go before unsaved local ones.
+        entry.history.messages[entry.persisted : entry.persisted] = messages
+        entry.persisted += len(messages)
+        entry.cursor = cursor
+
+    def _flush(self, key, entry: _Entry) -> None:
+        messages = entry.history.messages
+        if len(messages) > entry.persisted:
+            earlier, cursor = self._append(key, messages[entry.persisted :], entry.cursor)
+            self._insert_persisted(entry, earlier, cursor)
+            entry.persisted = len(messages)
+
+    def _resize(self, entry: _Entry) -> None:
+        size = estimate_history_size(entry.history)
+        self._bytes += size - entry.size
+        entry.size = size
+
+    def _drop(self, key) -> None:
+        entry = self._entries.pop(key)
+        self._flush(key, entry)
+        self._bytes -= entry.size
+
+    def _expire(self) -> None:
+        if self.ttl_seconds is None:
+            return
+        deadline = time.monotonic() - self.ttl_seconds
+        # Entries are kept in access order, so expired ones are at the front.
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.last_access > deadline:
+                break
+            self._drop(key)
+            self.expirations += 1
+
+    def _evict(self, keep=None) -> None:
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_sessions
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            key = next(iter(self._entries))
+            if key == keep:
+                self._entries.move_to_end(key)
+                key = next(iter(self._entries))
+            self._drop(key)
+            self.evictions += 1
+
+
+class InMemorySessionStore(SessionStore):
+    """Sessions live only in this process; evicted sessions are gone."""
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions are written through to a SQLite file, one row per message, so
+    evicted sessions are rehydrated on demand and several gunicorn workers can
+    share the same file without sticky routing. Row ids are assigned by
+    SQLite, so concurrent appends from different workers never overwrite
+    each other.
+    """
+
+    def __init__(self, path="sessions.sqlite3", **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS session_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    message TEXT NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                """CREATE INDEX IF NOT EXISTS session_messages_by_session
+                ON session_messages (user_id, session_id, id)"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS summaries (
+                    user_id TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    upto INTEGER NOT NULL,
+                    PRIMARY KEY (user_id, session_id)
+                )"""
+            )
+            # Files from before row ids: copy the old positional table over.
+            old = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages'"
+            ).fetchone()
+            if old:
+                self._conn.execute(
+                    """INSERT INTO session_messages (user_id, session_id, message)
+                    SELECT user_id, session_id, message FROM messages ORDER BY user_id, session_id, seq"""
+                )
+                self._conn.execute("DROP TABLE messages")
+
+    def _select_after(self, key, cursor):
+        rows = self._conn.execute(
+            "SELECT id, message FROM session_messages WHERE user_id = ? AND session_id = ? AND id > ? ORDER BY id",
+            (*key, cursor or 0),
+        ).fetchall()
+        messages = messages_from_dict([json.loads(row[1]) for row in rows])
+        return messages, rows[-1][0] if rows else cursor
+
+    def _load_after(self, key, cursor) -> tuple:
+        with self._db_lock:
+            return self._select_after(key, cursor)
+
+    def _append(self, key, messages: list, cursor) -> tuple:
+        with self._db_lock, self._conn:
+            # Take the write lock first, so nothing lands between the read and our rows.
+            self._conn.execute("BEGIN IMMEDIATE")
+            earlier, cursor = self._select_after(key, cursor)
+            for message in messages:
+                cursor = self._conn.execute(
+                    "INSERT INTO session_messages (user_id, session_id, message) VALUES (?, ?, ?)",
+                    (*key, json.dumps(message_to_dict(message))),
+                ).lastrowid
+            return earlier, cursor
+
+    def _load_summary(self, key):
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT summary, upto FROM summaries WHERE user_id = ? AND session_id = ?",
+                key,
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _save_summary(self, key, summary: str, upto: int) -> None:
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (user_id, session_id, summary, upto) VALUES (?, ?, ?, ?)",
+                (*key, summary, upto),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            for key, entry in self._entries.items():
+                self._flush(key, entry)
+            with self._db_lock:
+                self._conn.close()
+
+
+def create_session_store() -> SessionStore:
+    """
+    Build the session store configured through environment variables:
+
+        SESSION_STORE         "memory" (default) or "sqlite"
+        SESSION_STORE_PATH    SQLite file, defaults to "sessions.sqlite3"
+        SESSION_MAX_SESSIONS  sessions kept in memory, defaults to 1000
+        SESSION_TTL_SECONDS   idle time before a session is evicted, defaults to 3600
+        SESSION_MAX_BYTES     memory budget for cached sessions, defaults to 64 MB
+    """
+    kwargs = {
+        "max_sessions": int(os.getenv("SESSION_MAX_SESSIONS", 1000)),
+        "ttl_seconds": float(os.getenv("SESSION_TTL_SECONDS", 3600)),
+        "max_bytes": int(os.getenv("SESSION_MAX_BYTES", 64 * 1024 * 1024)),
+    }
+    backend = os.getenv("SESSION_STORE", "memory").lower()
+    if backend == "sqlite":
+        return SQLiteSessionStore(
+            path=os.getenv("SESSION_STORE_PATH", "sessions.sqlite3"), **kwargs
+        )
+    if backend == "memory":
+        return InMemorySessionStore(**kwargs)
+    raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
@@ -0,0 +1,100 @@
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+
+# Key under which per-turn metadata is kept in HumanMessage.additional_kwargs.
+TURN_KEY = "turn"
+
+
+def approx_token_count(text: str) -> int:
+    """Cheap, offline token estimate (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def count_message_tokens(messages: list) -> int:
+    return sum(approx_token_count(str(m.content)) for m in messages)
+
+
+def emotion_labels(emotion_result) -> list:
+    """
+    Normalise an emotion result (pipeline dicts or InferenceClient elements)
+    into [{"label": ..., "score": ...}] with rounded scores.
+    """
+    labels = []
+    for item in emotion_result or []:
+        if isinstance(item, dict):
+            label, score = item.get("label"), item.get("score")
+        else:
+            label, score = getattr(item, "label", None), getattr(item, "score", None)
+        if label is not None:
+            labels.append({"label": label, "score": round(float(score or 0.0), 2)})
+    return labels
+
+
+def document_refs(rag_docs) -> list:
+    """Compact references to retrieved documents: source name and chunk id."""
+    refs = []
+    for doc in rag_docs or []:
+        refs.append(
+            {
+                "source": doc.metadata.get("source", "unknown"),
+                "id": getattr(doc, "id", None),
+            }
+        )
+    return refs
+
+
+def make_user_turn(
+    query: str, rag_docs, emotion_result, reasoning: str, strategy_list: list
+) -> HumanMessage:
+    """
+    Build the persisted user turn: the raw user text as content, with the
+    retrieval, emotion and strategy results kept as structured metadata.
+    """
+    return HumanMessage(
+        content=query,
+        additional_kwargs={
+            TURN_KEY: {
+                "sources": document_refs(rag_docs),
+                "emotions": emotion_labels(emotion_result),
+                "strategy": list(strategy_list),
+                "reasoning": reasoning,
+            }
+        },
+    )
+
+
+def turn_metadata(message: BaseMessage) -> dict:
+    return message.additional_kwargs.get(TURN_KEY, {})
+
+
+def compact_reference(meta: dict) -> str:
+    """One-line summary of a turn's metadata, e.g. `[emotions: sadness 0.71 | strategy: Question]`."""
+    parts = []
+    if meta.get("emotions"):
+        parts.append(
+            "emotions: "
+            + ", ".join(f"{e['label']} {e['score']:.2f}" for e in meta["emotions"])
+        )
+    if meta.get("strategy"):
+        parts.append("strategy: " + ", ".join(meta["strategy"]))
+    if meta.get("sources"):
+        sources = dict.fromkeys(ref["source"] for ref in meta["sources"])
+        parts.append("sources: " + "; ".join(sources))
+    return f"[{' | '.join(parts)}]" if parts else ""
+
+
+def build_prompt_history(messages: list) -> list:
+    """
+    Messages to send as `history`: raw user text plus a compact reference line
+    per user turn. Retrieved passages and reasoning are never replayed.
+    """
+    history = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            reference = compact_reference(turn_metadata(message))
+            content = f"{message.content}\n{reference}" if reference else message.content
+            history.append(HumanMessage(content=content))
+        elif isinstance(message, AIMessage):
+            history.append(AIMessage(content=message.content))
+        else:
+            history.append(message)
+    return history
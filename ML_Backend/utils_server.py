@@ -9,7 +9,7 @@ from TaskBot.utils import (
 from langchain_core.prompts import PromptTemplate
 from TaskBot.bot import Taskbot
 from utils import extract_json_from_string, format_task
-from RAG.create_user_embeds import upload_interests_to_rag
+from RAG.create_user_embeds import find_similar_users, upload_interests_to_rag
 
 app = Flask(__name__)
 
@@ -96,5 +96,28 @@ async def create_user_embedding():
     return jsonify({"message": "User embedding created"}), 200
 
 
+@app.route("/api/similar_users", methods=["POST"])
+async def similar_users():
+    if not request.is_json:
+        return jsonify({"error": "Request content-type must be application/json"}), 400
+
+    # Parse the JSON data from the request
+    data = request.get_json()
+    try:
+        user_id = data["user_id"]
+        if isinstance(user_id, bool) or not isinstance(user_id, (int, str)):
+            raise TypeError
+        user_id = str(user_id)
+        k = int(data.get("k", 10))
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "user_id (string or integer) is required and k must be an integer"}), 400
+    try:
+        matches = find_similar_users(user_id, k=k)
+    except KeyError:
+        return jsonify({"error": f"No interests uploaded for user {user_id}"}), 404
+
+    return jsonify({"user_id": user_id, "matches": matches}), 200
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8500, debug=True)